@@ -1,4 +1,13 @@
+import pytest
+
+from yatube.test_runner import isolate_metrics
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(scope='session', autouse=True)
+def metrics_dir():
+    isolate_metrics()
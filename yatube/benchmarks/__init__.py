@@ -0,0 +1,9 @@
+"""
+Нагрузочные тесты yatube.
+
+Запуск из каталога с manage.py:
+
+    python manage.py generate_dataset --users 1000 --posts 20000
+    python -m benchmarks.load --concurrency 8 --requests 2000 \\
+        --output results/HEAD.json --compare results/main.json
+"""
@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def setup_django():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    django.setup()
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+def summarize(latencies, elapsed):
+    return {
+        'requests': len(latencies),
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_results(path, results):
+    results = dict(results, revision=git_revision(), timestamp=time.time())
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as fp:
+        json.dump(results, fp, indent=2, ensure_ascii=False)
+
+
+def print_table(views, baseline=None):
+    out = io.StringIO()
+    out.write(f'{"view":<20}{"req":>8}{"rps":>10}'
+              f'{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}\n')
+    for name, stats in sorted(views.items()):
+        out.write(
+            f'{name:<20}{stats["requests"]:>8}{stats["throughput"]:>10.1f}'
+            f'{stats["p50_ms"]:>10.1f}{stats["p95_ms"]:>10.1f}'
+            f'{stats["p99_ms"]:>10.1f}\n'
+        )
+        old = (baseline or {}).get(name)
+        if old:
+            out.write(
+                f'{"  vs baseline":<28}'
+                f'{delta(old["throughput"], stats["throughput"]):>10}'
+                f'{delta(old["p50_ms"], stats["p50_ms"]):>10}'
+                f'{delta(old["p95_ms"], stats["p95_ms"]):>10}'
+                f'{delta(old["p99_ms"], stats["p99_ms"]):>10}\n'
+            )
+    print(out.getvalue(), end='')
+
+
+def delta(old, new):
+    if not old:
+        return '-'
+    return f'{(new - old) / old * 100:+.0f}%'
@@ -0,0 +1,220 @@
+"""
+Прогоняет WSGI-приложение из yatube/wsgi.py параллельными клиентами
+и печатает пропускную способность и p50/p95/p99 для каждой страницы.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from .common import setup_django, summarize, save_results, print_table
+
+MIX = (
+    ('index', 30),
+    ('index_page', 10),
+    ('group', 15),
+    ('profile', 15),
+    ('post', 20),
+    ('follow_index', 10),
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--login-ratio', type=float, default=0.5,
+                        help='Доля клиентов с авторизацией')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Куда сохранить JSON с итогами')
+    parser.add_argument('--compare', help='JSON прошлого прогона')
+    parser.add_argument('--debug', action='store_true',
+                        help='Не выключать DEBUG (медленнее)')
+    return parser.parse_args(argv)
+
+
+class Targets:
+    def __init__(self, sample=500):
+        from django.conf import settings
+        from django.urls import reverse
+        from posts.models import Post, Group, User
+
+        self.reverse = reverse
+        self.usernames = list(
+            User.objects.filter(posts__isnull=False).distinct()
+            .values_list('username', flat=True)[:sample])
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        self.posts = list(
+            Post.objects.values_list('author__username', 'id')[:sample])
+        self.pages = max(
+            1, -(-Post.objects.count() // settings.PAGINATOR_PER_PAGE_VAL))
+        if not self.posts:
+            raise SystemExit(
+                'База пуста, сначала выполните manage.py generate_dataset')
+
+    def url(self, view, rnd):
+        if view == 'index':
+            return self.reverse('index'), ''
+        if view == 'index_page':
+            page = rnd.randint(min(2, self.pages), self.pages)
+            return self.reverse('index'), f'page={page}'
+        if view == 'group':
+            return self.reverse('group', args=[rnd.choice(self.slugs)]), ''
+        if view == 'profile':
+            return self.reverse(
+                'profile', args=[rnd.choice(self.usernames)]), ''
+        if view == 'post':
+            username, post_id = rnd.choice(self.posts)
+            return self.reverse('post', args=[username, post_id]), ''
+        return self.reverse('follow_index'), ''
+
+
+def make_session(user):
+    from django.contrib.auth import (
+        BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY)
+    from django.contrib.sessions.backends.db import SessionStore
+
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+def call(application, path, query, cookie):
+    environ = {}
+    setup_testing_defaults(environ)
+    environ.update({
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'HTTP_HOST': 'localhost',
+        'REMOTE_ADDR': '127.0.0.1',
+    })
+    if cookie:
+        environ['HTTP_COOKIE'] = cookie
+    status = []
+    body = application(
+        environ, lambda code, headers, exc_info=None: status.append(code))
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return int(status[0].split()[0])
+
+
+class Worker:
+    '''Общие для потоков счётчик запросов и собранные замеры.'''
+
+    def __init__(self, application, targets, cookies, options):
+        self.application = application
+        self.targets = targets
+        self.cookies = cookies
+        self.options = options
+        self.views, self.weights = zip(*MIX)
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+        self.counter = iter(range(options.warmup + options.requests))
+
+    def next_number(self):
+        with self.lock:
+            return next(self.counter, None)
+
+    def pick(self, rnd):
+        view = rnd.choices(self.views, self.weights)[0]
+        cookie = ''
+        if self.cookies and (view == 'follow_index'
+                             or rnd.random() < self.options.login_ratio):
+            cookie = rnd.choice(self.cookies)
+        elif view == 'follow_index':
+            view = 'index'
+        return view, cookie
+
+    def __call__(self, seed):
+        from django.db import connections
+
+        rnd = random.Random(seed)
+        number = self.next_number()
+        while number is not None:
+            view, cookie = self.pick(rnd)
+            path, query = self.targets.url(view, rnd)
+            start = time.perf_counter()
+            status = call(self.application, path, query, cookie)
+            elapsed = time.perf_counter() - start
+            if number >= self.options.warmup:
+                with self.lock:
+                    self.latencies[view].append(elapsed)
+                    if status >= 400:
+                        self.errors[view] += 1
+            number = self.next_number()
+        connections.close_all()
+
+
+def collect(worker, options, total_elapsed):
+    latencies = worker.latencies
+    return {
+        'concurrency': options.concurrency,
+        'total': summarize(
+            [value for values in latencies.values() for value in values],
+            total_elapsed),
+        'views': {
+            view: dict(summarize(values, total_elapsed),
+                       errors=worker.errors[view])
+            for view, values in latencies.items()
+        },
+    }
+
+
+def report(results, options):
+    baseline = None
+    if options.compare:
+        with open(options.compare) as fp:
+            baseline = json.load(fp)['views']
+    print_table(results['views'], baseline)
+    total = results['total']
+    print(f'Всего: {total["requests"]} запросов, '
+          f'{total["throughput"]:.1f} rps, p95 {total["p95_ms"]:.1f} ms')
+    if options.output:
+        save_results(options.output, results)
+
+
+def run(options):
+    setup_django()
+    from django.conf import settings
+    from posts.models import User
+    from yatube.wsgi import application
+
+    if not options.debug:
+        settings.DEBUG = False
+    users = list(User.objects.filter(follower__isnull=False).distinct()[:50])
+    cookies = [
+        f'{settings.SESSION_COOKIE_NAME}={make_session(user)}'
+        for user in users
+    ]
+    worker = Worker(application, Targets(), cookies, options)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(options.concurrency) as pool:
+        futures = [
+            pool.submit(worker, options.seed + i)
+            for i in range(options.concurrency)
+        ]
+        for future in futures:
+            future.result()
+    results = collect(worker, options, time.perf_counter() - started)
+    report(results, options)
+    return results
+
+
+if __name__ == '__main__':
+    run(parse_args())
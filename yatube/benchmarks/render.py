@@ -0,0 +1,90 @@
+"""
+Время рендера страницы ленты: без кэша загрузчика и с include на
+каждый пост (как было) против кэширующего загрузчика и одного
+прохода тегом post_list (как сейчас).
+"""
+import argparse
+import time
+
+from .common import setup_django, percentile, save_results
+
+# лайки в обоих случаях не подгружаются: тег на каждый пост иначе
+# добавлял бы свои SQL-запросы, а сравнивается только рендер
+BEFORE = (
+    '{% load posts_tags %}'
+    '{% for post in page %}{% post_list post defer_likes=True %}{% endfor %}'
+)
+AFTER = '{% load posts_tags %}{% post_list page defer_likes=True %}'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--output', help='Куда сохранить JSON с итогами')
+    return parser.parse_args(argv)
+
+
+def make_engine(cached):
+    from django.conf import settings
+    from django.template.backends.django import DjangoTemplates
+
+    loaders = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    options = dict(settings.TEMPLATES[0]['OPTIONS'], loaders=loaders)
+    return DjangoTemplates({
+        'NAME': 'cached' if cached else 'plain',
+        'DIRS': settings.TEMPLATES[0]['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': options,
+    })
+
+
+def measure(template, context, request, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        template.render(context, request)
+        timings.append(time.perf_counter() - start)
+    return {
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+    }
+
+
+def run(options):
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.paginator import Paginator
+    from django.test import RequestFactory
+    from posts.models import Post
+
+    settings.DEBUG = False
+    page = Paginator(
+        Post.objects.for_feed(), settings.PAGINATOR_PER_PAGE_VAL).page(1)
+    list(page)
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    context = {'page': page}
+    results = {}
+    for name, source, cached in (('before', BEFORE, False),
+                                 ('after', AFTER, True)):
+        engine = make_engine(cached)
+        # from_string не кэшируется, поэтому шаблон создаётся один раз,
+        # а разницу дают вложенные шаблоны, которые грузит тег
+        results[name] = measure(
+            engine.from_string(source), context, request,
+            options.iterations)
+        print(f'{name:<8} p50 {results[name]["p50_ms"]:6.2f} ms, '
+              f'p95 {results[name]["p95_ms"]:6.2f} ms')
+    if options.output:
+        save_results(options.output, results)
+    return results
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,127 @@
+"""
+Пропускная способность чтения index, пока параллельно идут записи
+через new_post. Сравнивает журнал DELETE (по умолчанию в SQLite)
+с профилем из settings.SQLITE_PRAGMAS.
+"""
+import argparse
+import random
+import threading
+import time
+
+from .common import setup_django, summarize, save_results
+from .load import call
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--output', help='Куда сохранить JSON с итогами')
+    return parser.parse_args(argv)
+
+
+class Stats:
+    '''Замеры, которые потоки читателей и писателей копят вместе.'''
+
+    def __init__(self):
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.reads, self.writes, self.errors = [], [], []
+
+    def add(self, kind, elapsed, status):
+        with self.lock:
+            (self.reads if kind == 'read' else self.writes).append(elapsed)
+            if status >= 400:
+                self.errors.append(kind)
+
+
+def reader(stats, seed):
+    from django.db import OperationalError, connections
+    from yatube.wsgi import application
+
+    rnd = random.Random(seed)
+    while not stats.stop.is_set():
+        start = time.perf_counter()
+        try:
+            status = call(application, '/', f'page={rnd.randint(1, 20)}', '')
+        except OperationalError:
+            status = 500
+        stats.add('read', time.perf_counter() - start, status)
+    connections.close_all()
+
+
+def writer(stats, user):
+    from django.db import OperationalError, connections
+    from django.test import Client
+
+    client = Client()
+    client.force_login(user)
+    while not stats.stop.is_set():
+        start = time.perf_counter()
+        try:
+            response = client.post('/new/', {'text': 'benchmark'})
+            status = response.status_code
+        except OperationalError:
+            status = 500
+        stats.add('write', time.perf_counter() - start, status)
+    connections.close_all()
+
+
+def run_mode(name, pragmas, options):
+    from django.conf import settings
+    from django.db import connections
+    from posts.models import User
+
+    connections.close_all()
+    settings.SQLITE_PRAGMAS = pragmas
+    writers = list(User.objects.all()[:options.writers])
+    stats = Stats()
+    threads = [
+        threading.Thread(target=reader, args=(stats, i))
+        for i in range(options.readers)
+    ] + [
+        threading.Thread(target=writer, args=(stats, user))
+        for user in writers
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(options.duration)
+    stats.stop.set()
+    for thread in threads:
+        thread.join()
+    result = {
+        'reads': summarize(stats.reads, options.duration),
+        'writes': summarize(stats.writes, options.duration),
+        'read_errors': stats.errors.count('read'),
+        'write_errors': stats.errors.count('write'),
+    }
+    print(f'{name:<10} чтение {result["reads"]["throughput"]:8.1f} rps '
+          f'p95 {result["reads"]["p95_ms"]:7.1f} ms | '
+          f'запись {result["writes"]["throughput"]:6.1f} rps | '
+          f'ошибок {result["read_errors"]}/{result["write_errors"]}')
+    return result
+
+
+def run(options):
+    setup_django()
+    from django.conf import settings
+
+    settings.DEBUG = False
+    # записи не должны упираться в ограничение частоты
+    settings.RATELIMIT_ENABLE = False
+    tuned = dict(settings.SQLITE_PRAGMAS)
+    results = {
+        'delete': run_mode('delete', {
+            'journal_mode': 'DELETE',
+            'synchronous': 'FULL',
+        }, options),
+        'tuned': run_mode('tuned', tuned, options),
+    }
+    if options.output:
+        save_results(options.output, results)
+    return results
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -1,13 +1,125 @@
 from django.contrib import admin
-from .models import Post, Group
+from django.contrib.auth.admin import UserAdmin
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
 
+from .models import Post, Group, Comment, Follow, PurgeRequest, User
+from .purge import schedule_purge
 
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('text', 'pub_date', 'author')
-    search_fields = ('text',)
+# дальше этого числа строки в списке не считаются
+COUNT_LIMIT = 10000
+# среди скольких последних строк искать подстроку
+SEARCH_RECENT_ROWS = 10000
+
+
+class LimitedCountPaginator(Paginator):
+    '''
+    Считает строки не дальше COUNT_LIMIT: COUNT(*) по всей таблице
+    на миллионах строк занимает секунды.
+    '''
+
+    @cached_property
+    def count(self):
+        return self.object_list.order_by()[:COUNT_LIMIT].count()
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    '''
+    Основа для списков больших таблиц: без полного подсчёта строк
+    и с поиском по индексам. Поля search_fields с «=» ищутся точным
+    совпадением (id — только если введено число), а по остальным
+    полям подстрока ищется только среди SEARCH_RECENT_ROWS последних
+    строк: диапазон по первичному ключу ограничивает перебор.
+    '''
+    paginator = LimitedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip().lstrip('@')
+        if not term:
+            return queryset, False
+        query = Q()
+        text = Q()
+        for field in self.search_fields:
+            if not field.startswith('='):
+                text |= Q(**{f'{field}__icontains': term})
+                continue
+            field = field[1:]
+            if field.endswith('pk') and not term.isdigit():
+                continue
+            query |= Q(**{field: term})
+        if text:
+            last_pk = self.model._default_manager.order_by(
+                '-pk').values_list('pk', flat=True).first() or 0
+            query |= text & Q(pk__gt=last_pk - SEARCH_RECENT_ROWS)
+        return queryset.filter(query), False
+
+
+class PostAdmin(ScalableAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author', 'group')
+    search_fields = ('=pk', '=author__username', 'text')
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
 
 
+class CommentAdmin(ScalableAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post__author')
+    raw_id_fields = ('author', 'post')
+    search_fields = ('=pk', '=author__username', '=post__pk')
+    date_hierarchy = 'created'
+
+
+class FollowAdmin(ScalableAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+    search_fields = ('=user__username', '=author__username')
+
+
+class PurgeInBackgroundMixin:
+    '''
+    Удаление из админки только ставит объект в очередь purge_deleted:
+    обычное каскадное удаление держит базу заблокированной, пока
+    собирает в память все посты и комментарии. Страница подтверждения
+    тоже не перечисляет зависимые объекты.
+    '''
+    purge_field = None
+
+    def delete_model(self, request, obj):
+        schedule_purge(**{self.purge_field: obj})
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
+
+    def get_deleted_objects(self, objs, request):
+        return [str(obj) for obj in objs], {}, set(), []
+
+
+class PurgingUserAdmin(PurgeInBackgroundMixin, UserAdmin):
+    purge_field = 'user'
+
+
+class GroupAdmin(PurgeInBackgroundMixin, admin.ModelAdmin):
+    purge_field = 'group'
+    list_display = ('title', 'slug')
+
+
+class PurgeRequestAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'group', 'created')
+    list_select_related = ('user', 'group')
+    raw_id_fields = ('user', 'group')
+
+
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(PurgeRequest, PurgeRequestAdmin)
+admin.site.unregister(User)
+admin.site.register(User, PurgingUserAdmin)
@@ -0,0 +1,106 @@
+from django.db import transaction
+
+from .models import (
+    Post, Comment, PostRevision, ArchivedPost, ArchivedComment,
+    ArchivedPostRevision)
+from .reactions import pending_likes
+
+
+class ChainedQuerySets:
+    '''
+    Склеивает два упорядоченных QuerySet для Paginator: сначала все
+    записи первого, затем второго. В базу уходят только срезы,
+    которые попали на запрошенную страницу.
+    '''
+    ordered = True
+
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+        self._first_count = None
+
+    def first_count(self):
+        if self._first_count is None:
+            self._first_count = self.first.count()
+        return self._first_count
+
+    def count(self):
+        return self.first_count() + self.second.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = index.stop if index.stop is not None else self.count()
+        split = self.first_count()
+        items = []
+        if start < split:
+            items += list(self.first[start:min(stop, split)])
+        if stop > split:
+            items += list(self.second[max(start - split, 0):stop - split])
+        return items
+
+
+def period_of(post):
+    return post.pub_date.strftime('%Y-%m')
+
+
+def archive_batch(cutoff, batch_size):
+    '''
+    Переносит в архив пачку постов старше cutoff вместе с комментариями
+    и историей правок.
+    Возвращает число перенесённых постов.
+    '''
+    with transaction.atomic():
+        posts = list(
+            Post.objects.filter(pub_date__lt=cutoff)
+            .order_by('pub_date')[:batch_size])
+        if not posts:
+            return 0
+        ids = [post.id for post in posts]
+        pending = pending_likes(ids)
+        ArchivedPost.objects.bulk_create([
+            ArchivedPost(
+                id=post.id,
+                period=period_of(post),
+                text=post.text,
+                pub_date=post.pub_date,
+                author_id=post.author_id,
+                group_id=post.group_id,
+                image=post.image,
+                views=post.views,
+                likes=post.likes + pending.get(post.id, 0),
+                text_html=post.text_html,
+            )
+            for post in posts
+        ])
+        comments = Comment.objects.filter(post_id__in=ids)
+        ArchivedComment.objects.bulk_create([
+            ArchivedComment(
+                id=comment.id,
+                post_id=comment.post_id,
+                author_id=comment.author_id,
+                text=comment.text,
+                created=comment.created,
+                text_html=comment.text_html,
+            )
+            for comment in comments.iterator()
+        ])
+        comments.delete()
+        revisions = PostRevision.objects.filter(post_id__in=ids)
+        ArchivedPostRevision.objects.bulk_create([
+            ArchivedPostRevision(
+                post_id=revision.post_id,
+                number=revision.number,
+                is_snapshot=revision.is_snapshot,
+                data=revision.data,
+                created=revision.created,
+            )
+            for revision in revisions.iterator()
+        ])
+        revisions.delete()
+        Post.objects.filter(id__in=ids).delete()
+    return len(ids)
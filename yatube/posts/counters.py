@@ -0,0 +1,90 @@
+import atexit
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connections, router
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Post
+
+_lock = threading.Lock()
+_pending = Counter()
+_last_flush = time.monotonic()
+# база, для которой накоплены просмотры
+_database = None
+
+
+def database_name():
+    return connections[router.db_for_write(Post)].settings_dict['NAME']
+
+
+def record_view(post_id):
+    '''
+    Учитывает просмотр поста в буфере процесса.
+    В базу счётчики попадают пачкой не чаще раза в
+    VIEW_COUNTER_FLUSH_INTERVAL секунд, поэтому при падении воркера
+    теряется не больше просмотров, чем накоплено за интервал.
+    '''
+    global _database
+    database = database_name()
+    with _lock:
+        _database = database
+        _pending[post_id] += 1
+        due = (
+            time.monotonic() - _last_flush
+            >= settings.VIEW_COUNTER_FLUSH_INTERVAL
+            or len(_pending) >= settings.VIEW_COUNTER_MAX_PENDING
+        )
+    if due:
+        try:
+            flush()
+        except DatabaseError:
+            # база занята: просмотры вернулись в буфер, попробуем позже
+            pass
+
+
+def pending_views(post_id):
+    with _lock:
+        return _pending[post_id]
+
+
+def flush():
+    '''
+    Записывает накопленные приращения одним UPDATE.
+    Возвращает число обновлённых постов.
+    '''
+    global _last_flush
+    with _lock:
+        batch = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not batch:
+        return 0
+    deltas = Case(
+        *[When(pk=pk, then=Value(delta)) for pk, delta in batch.items()],
+        default=Value(0),
+        output_field=IntegerField()
+    )
+    try:
+        return Post.objects.filter(pk__in=batch).update(
+            views=F('views') + deltas)
+    except DatabaseError:
+        with _lock:
+            _pending.update(batch)
+        raise
+
+
+def _flush_on_exit():
+    # после тестов настройки уже указывают на рабочую базу, а тестовая
+    # удалена: её просмотры никуда не пишем
+    if _database != database_name():
+        return
+    try:
+        flush()
+    except DatabaseError:
+        pass
+
+
+atexit.register(_flush_on_exit)
@@ -0,0 +1,49 @@
+import re
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from .models import Follow, User
+
+# не упираемся в лимит параметров SQLite
+CHUNK_SIZE = 500
+
+
+def parse_usernames(text):
+    '''Имена через пробелы, запятые или с новой строки, можно с @.'''
+    return [name.lstrip('@') for name in re.split(r'[\s,]+', text) if name]
+
+
+def follow_many(user, usernames):
+    '''
+    Подписывает user на авторов из usernames: имена разрешаются в id
+    пачками, подписки вставляются bulk_create с ignore_conflicts, так
+    что уже существующие не мешают и не вызывают лишних запросов.
+    Возвращает (найдено авторов, новых подписок).
+    '''
+    usernames = list(dict.fromkeys(usernames))
+    author_ids = []
+    for start in range(0, len(usernames), CHUNK_SIZE):
+        author_ids.extend(
+            User.objects.filter(
+                username__in=usernames[start:start + CHUNK_SIZE],
+                is_active=True,
+            ).exclude(pk=user.pk).values_list('pk', flat=True))
+    if not author_ids:
+        return 0, 0
+    before = Follow.objects.filter(user=user).count()
+    Follow.objects.bulk_create(
+        [Follow(user=user, author_id=author_id) for author_id in author_ids],
+        batch_size=CHUNK_SIZE,
+        ignore_conflicts=True,
+    )
+    created = Follow.objects.filter(user=user).count() - before
+    if created:
+        refresh_timeline(user)
+    return len(author_ids), created
+
+
+def refresh_timeline(user):
+    '''Сбрасывает закэшированную первую страницу ленты подписок.'''
+    cache.delete(make_template_fragment_key(
+        'follow_page', [user.username, 1]))
@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+from collections import deque, namedtuple
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+Event = namedtuple('Event', 'id author_id data')
+
+
+class Broker:
+    '''
+    Публикация событий внутри процесса. Хранит последние SSE_BACKLOG
+    событий, подписчики ждут на общем Condition и сами помнят, до
+    какого id дочитали, поэтому отдельных очередей не нужно.
+    События видят только клиенты того воркера, где создан пост.
+    '''
+
+    def __init__(self, backlog):
+        self.events = deque(maxlen=backlog)
+        self.condition = threading.Condition()
+
+    @property
+    def last_id(self):
+        with self.condition:
+            return self.events[-1].id if self.events else 0
+
+    def publish(self, event):
+        with self.condition:
+            self.events.append(event)
+            self.condition.notify_all()
+
+    def after(self, last_id):
+        return [event for event in self.events if event.id > last_id]
+
+    def wait(self, last_id, timeout):
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.after(last_id), timeout=timeout)
+            return self.after(last_id)
+
+
+broker = Broker(settings.SSE_BACKLOG)
+
+
+class StreamSlots:
+    '''
+    Счётчик открытых потоков SSE в процессе. Каждый поток занимает
+    поток WSGI-сервера, поэтому их не больше SSE_MAX_STREAMS, а
+    остальные потоки воркера остаются обычным запросам.
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+
+    def acquire(self):
+        with self.lock:
+            if self.active >= settings.SSE_MAX_STREAMS:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.active -= 1
+
+
+slots = StreamSlots()
+
+
+def publish_post(post):
+    '''
+    Карточка поста рендерится один раз при публикации, а не для
+    каждого подключённого клиента.
+    '''
+    # лайков у нового поста нет, кнопку клиент увидит после перезагрузки
+    post.likes_total = post.likes
+    html = render_to_string(
+        'include/post_list.html', {'posts': [post], 'user': None})
+    broker.publish(Event(post.id, post.author_id, json.dumps({
+        'id': post.id,
+        'author': post.author.username,
+        'html': html,
+    })))
+
+
+def event_stream(last_id, authors=None):
+    '''
+    Поток SSE: новые посты (только авторов из authors, если задано)
+    и комментарии-keepalive. Соединение закрывается через
+    SSE_MAX_LIFETIME секунд, браузер переподключится с Last-Event-ID.
+    Если свободных слотов нет, ответ сразу закрывается и браузер
+    повторит попытку через SSE_BUSY_RETRY_MS.
+    '''
+    # слот берётся при первой итерации, в потоке, который отдаёт ответ
+    if not slots.acquire():
+        yield f'retry: {settings.SSE_BUSY_RETRY_MS}\n\n'
+        return
+    try:
+        deadline = time.monotonic() + settings.SSE_MAX_LIFETIME
+        yield f'retry: {settings.SSE_RETRY_MS}\n\n'
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            events = broker.wait(
+                last_id, min(settings.SSE_KEEPALIVE, remaining))
+            if not events:
+                yield ': keepalive\n\n'
+                continue
+            for event in events:
+                last_id = event.id
+                if authors is not None and event.author_id not in authors:
+                    continue
+                yield (
+                    f'id: {event.id}\nevent: post\ndata: {event.data}\n\n')
+    finally:
+        slots.release()
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from posts.models import PostRevision
+from posts.revisions import compact
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет старые версии постов, оставляя у каждого поста '
+        'заданное число последних.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int,
+                            default=settings.POST_REVISION_KEEP,
+                            help='Сколько последних версий оставить')
+
+    def handle(self, *args, **options):
+        keep = max(options['keep'], 1)
+        post_ids = (
+            PostRevision.objects.values('post_id')
+            .annotate(total=Count('id')).filter(total__gt=keep)
+            .order_by().values_list('post_id', flat=True)
+        )
+        posts = deleted = 0
+        for post_id in post_ids.iterator():
+            deleted += compact(post_id, keep)
+            posts += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Постов: {posts}, удалено версий: {deleted}'))
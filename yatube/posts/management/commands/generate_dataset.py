@@ -0,0 +1,161 @@
+import io
+import random
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from PIL import Image
+
+from posts.models import Post, Group, User, Comment, Follow, render_text
+
+PASSWORD = 'benchmark'
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def zipf_weights(count, alpha):
+    return [1 / (rank ** alpha) for rank in range(1, count + 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетические данные для нагрузочных тестов: '
+        'пользователей, группы, посты с картинками, комментарии и граф '
+        f'подписок со степенным распределением. Пароль у всех: {PASSWORD}'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--follows-per-user', type=int, default=20,
+                            help='Среднее число подписок на пользователя')
+        parser.add_argument('--image-ratio', type=float, default=0.1,
+                            help='Доля постов с картинкой')
+        parser.add_argument('--alpha', type=float, default=1.1,
+                            help='Показатель степенного распределения')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        prefix = f'bench{uuid.uuid4().hex[:6]}'
+
+        with transaction.atomic():
+            users = self.create_users(prefix, options['users'], batch_size)
+            groups = self.create_groups(prefix, options['groups'])
+        # популярность авторов распределена по степенному закону
+        weights = zipf_weights(len(users), options['alpha'])
+        images = self.create_images(rnd, 5)
+
+        created = 0
+        for size in self.batches(options['posts'], batch_size):
+            authors = rnd.choices(users, weights, k=size)
+            Post.objects.bulk_create([
+                self.with_html(Post(
+                    text=self.text(rnd),
+                    author_id=author,
+                    group_id=rnd.choice(groups) if rnd.random() < 0.7
+                    else None,
+                    image=rnd.choice(images)
+                    if rnd.random() < options['image_ratio'] else None,
+                ))
+                for author in authors
+            ])
+            created += size
+        post_ids = list(
+            Post.objects.filter(author_id__in=users)
+            .values_list('id', flat=True))
+        self.stdout.write(f'Постов: {created}')
+
+        # комментируют чаще популярные посты
+        post_weights = zipf_weights(len(post_ids), options['alpha'])
+        for size in self.batches(options['comments'], batch_size):
+            Comment.objects.bulk_create([
+                self.with_html(Comment(
+                    post_id=post_id,
+                    author_id=rnd.choice(users),
+                    text=self.text(rnd, 1, 3),
+                ))
+                for post_id in rnd.choices(post_ids, post_weights, k=size)
+            ])
+        self.stdout.write(f'Комментариев: {options["comments"]}')
+
+        follows = set()
+        for user in users:
+            count = min(
+                len(users) - 1,
+                int(rnd.paretovariate(2) * options['follows_per_user'] / 2)
+            )
+            for author in rnd.choices(users, weights, k=count):
+                if author != user:
+                    follows.add((user, author))
+        for chunk in chunks(list(follows), batch_size):
+            Follow.objects.bulk_create(
+                [Follow(user_id=user, author_id=author)
+                 for user, author in chunk],
+                ignore_conflicts=True
+            )
+        self.stdout.write(f'Подписок: {len(follows)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, имена пользователей начинаются с {prefix}'))
+
+    def with_html(self, obj):
+        # bulk_create не вызывает save(), HTML считаем сами
+        obj.text_html = render_text(obj.text)
+        return obj
+
+    def batches(self, total, batch_size):
+        while total > 0:
+            size = min(total, batch_size)
+            total -= size
+            yield size
+
+    def create_users(self, prefix, count, batch_size):
+        password = make_password(PASSWORD)
+        names = [f'{prefix}_{i}' for i in range(count)]
+        for chunk in chunks(names, batch_size):
+            User.objects.bulk_create(
+                [User(username=name, password=password) for name in chunk])
+        self.stdout.write(f'Пользователей: {count}')
+        return list(
+            User.objects.filter(username__startswith=f'{prefix}_')
+            .values_list('id', flat=True))
+
+    def create_groups(self, prefix, count):
+        Group.objects.bulk_create([
+            Group(
+                title=f'Группа {i}',
+                slug=f'{prefix}-{i}',
+                description=f'Описание группы {i}'
+            )
+            for i in range(count)
+        ])
+        return list(
+            Group.objects.filter(slug__startswith=f'{prefix}-')
+            .values_list('id', flat=True))
+
+    def create_images(self, rnd, count):
+        names = []
+        for i in range(count):
+            color = tuple(rnd.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', (1200, 600), color).save(buffer, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/bench_{i}.jpg', ContentFile(buffer.getvalue())))
+        return names
+
+    def text(self, rnd, min_lines=1, max_lines=6):
+        words = ('yatube', 'пост', 'новости', 'django', 'sqlite', 'кэш',
+                 'лента', 'подписка', 'группа', 'комментарий')
+        return '\n'.join(
+            ' '.join(rnd.choices(words, k=rnd.randint(5, 20)))
+            for _ in range(rnd.randint(min_lines, max_lines)))
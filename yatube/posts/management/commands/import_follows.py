@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.follows import follow_many, parse_usernames
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Подписывает пользователя на авторов из списка имён: из файла '
+        'или из stdin, через пробелы, запятые или по одному в строке.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Кого подписываем')
+        parser.add_argument('--file', help='Файл с именами, иначе stdin')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'Нет пользователя {options["username"]}')
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as file:
+                text = file.read()
+        else:
+            text = sys.stdin.read()
+        usernames = parse_usernames(text)
+        found, followed = follow_many(user, usernames)
+        self.stdout.write(self.style.SUCCESS(
+            f'Имён: {len(usernames)}, найдено: {found}, '
+            f'новых подписок: {followed}'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.reactions import merge_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводит шарды счётчиков лайков в Post.likes. '
+        'Запускается периодически, например из cron раз в минуту.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            merged = merge_batch(options['batch_size'])
+            if not merged:
+                break
+            total += merged
+        self.stdout.write(self.style.SUCCESS(f'Сведено постов: {total}'))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.notifications import process_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассылает подписчикам уведомления о новых постах. '
+        'С --interval работает постоянно как фоновый обработчик.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Сколько постов разбирать за раз')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Сколько уведомлений писать одним запросом')
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Пауза между проходами, 0 — один проход')
+
+    def handle(self, *args, **options):
+        while True:
+            posts = users = 0
+            while True:
+                done, notified = process_batch(
+                    options['batch_size'], options['chunk_size'])
+                if not done:
+                    break
+                posts += done
+                users += notified
+            if posts or not options['interval']:
+                self.stdout.write(
+                    f'Постов: {posts}, уведомлений обновлено: {users}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
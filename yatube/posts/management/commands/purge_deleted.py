@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.purge import purge_pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Окончательно удаляет пользователей и группы, помеченные на '
+        'удаление, вместе с постами, комментариями и файлами. Удаляет '
+        'пачками, каждая пачка — отдельная короткая транзакция.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        done, files = purge_pending(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено объектов: {done}, файлов: {files}'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import (
+    Post, Comment, ArchivedPost, ArchivedComment, render_text)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет text_html у постов и комментариев, сохранённых до '
+        'появления поля или через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересчитать HTML у всех записей')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment, ArchivedPost, ArchivedComment):
+            queryset = model.objects.order_by('pk')
+            if not options['all']:
+                queryset = queryset.filter(text_html='')
+            total = self.backfill(queryset, options['batch_size'])
+            self.stdout.write(f'{model.__name__}: {total}')
+
+    def backfill(self, queryset, batch_size):
+        total = 0
+        last_pk = None
+        while True:
+            batch = queryset.only('pk', 'text')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                return total
+            for obj in batch:
+                obj.text_html = render_text(obj.text)
+            queryset.model.objects.bulk_update(batch, ['text_html'])
+            total += len(batch)
+            last_pk = batch[-1].pk
@@ -0,0 +1,143 @@
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.models import Post, Follow, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассылает пользователям дайджест новых постов авторов, на которых '
+        'они подписаны. Пользователи читаются потоком и обрабатываются '
+        'пачками; после каждой пачки сохраняется точка продолжения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24,
+                            help='За сколько часов собирать посты')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Сколько пользователей обрабатывать за раз')
+        parser.add_argument('--limit', type=int,
+                            default=settings.DIGEST_POSTS_LIMIT,
+                            help='Сколько постов показывать в письме')
+        parser.add_argument('--resume', action='store_true',
+                            help='Продолжить прерванную рассылку')
+        parser.add_argument('--checkpoint',
+                            default=settings.DIGEST_CHECKPOINT_FILE)
+
+    def handle(self, *args, **options):
+        self.checkpoint = options['checkpoint']
+        since, last_user_id = self.start(options)
+        self.limit = options['limit']
+        self.template = get_template('email/digest.txt')
+        # посты автора за период одинаковы для всех его подписчиков
+        self.posts_by_author = {}
+        # сколько всего новых постов у автора, включая не вошедшие в письмо
+        self.totals_by_author = {}
+        users = (
+            User.objects.filter(is_active=True, id__gt=last_user_id)
+            .exclude(email='').order_by('id')
+            .only('id', 'username', 'email')
+        )
+        processed = sent = 0
+        batch = []
+        with get_connection() as connection:
+            for user in users.iterator(chunk_size=options['batch_size']):
+                batch.append(user)
+                if len(batch) < options['batch_size']:
+                    continue
+                sent += self.send_batch(batch, since, connection)
+                processed += len(batch)
+                self.progress(since, batch[-1].id, processed, sent)
+                batch = []
+            if batch:
+                sent += self.send_batch(batch, since, connection)
+                processed += len(batch)
+                self.progress(since, batch[-1].id, processed, sent)
+        if os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: пользователей {processed}, писем {sent}'))
+
+    def start(self, options):
+        if not options['resume']:
+            return timezone.now() - timedelta(hours=options['hours']), 0
+        try:
+            with open(self.checkpoint) as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            raise CommandError(f'Нет точки продолжения: {self.checkpoint}')
+        self.stdout.write(
+            f'Продолжаем с пользователя id > {state["last_user_id"]}')
+        return parse_datetime(state['since']), state['last_user_id']
+
+    def progress(self, since, last_user_id, processed, sent):
+        with open(self.checkpoint, 'w') as file:
+            json.dump({
+                'since': since.isoformat(),
+                'last_user_id': last_user_id,
+            }, file)
+        self.stdout.write(f'Пользователей: {processed}, писем: {sent}')
+
+    def send_batch(self, users, since, connection):
+        follows = {}
+        for user_id, author_id in Follow.objects.filter(
+                user_id__in=[user.id for user in users]
+        ).values_list('user_id', 'author_id'):
+            follows.setdefault(user_id, []).append(author_id)
+        self.load_posts(
+            {author for authors in follows.values() for author in authors},
+            since)
+
+        messages = []
+        for user in users:
+            posts = [
+                post
+                for author in follows.get(user.id, ())
+                for post in self.posts_by_author[author]
+            ]
+            if not posts:
+                continue
+            posts.sort(key=lambda post: post['pub_date'], reverse=True)
+            messages.append(EmailMessage(
+                'Дайджест Yatube',
+                self.template.render({
+                    'user': user,
+                    'site_url': settings.SITE_URL.rstrip('/'),
+                    'posts': posts[:self.limit],
+                    'total': sum(
+                        self.totals_by_author[author]
+                        for author in follows[user.id]),
+                }),
+                to=[user.email]))
+        if messages:
+            connection.send_messages(messages)
+        return len(messages)
+
+    def load_posts(self, authors, since):
+        '''Догружает пачкой запросов посты авторов, которых ещё не видели.'''
+        missing = [a for a in authors if a not in self.posts_by_author]
+        for author in missing:
+            self.posts_by_author[author] = []
+            self.totals_by_author[author] = 0
+        # не упираемся в лимит параметров SQLite
+        for start in range(0, len(missing), 500):
+            posts = Post.objects.filter(
+                author_id__in=missing[start:start + 500],
+                author__is_active=True,
+                pub_date__gte=since
+            ).order_by('-pub_date').values(
+                'id', 'text', 'pub_date', 'author_id', 'author__username')
+            for post in posts.iterator():
+                self.totals_by_author[post['author_id']] += 1
+                by_author = self.posts_by_author[post['author_id']]
+                # больше limit постов одного автора в письмо не попадёт
+                if len(by_author) < self.limit:
+                    by_author.append(post)
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.6 on 2026-10-19 20:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def mark_existing_notified(apps, schema_editor):
+    # старые посты не рассылаем
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(notified=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0016_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='notified',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.RunPython(mark_existing_notified, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.DateTimeField(verbose_name='Начало окна')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Новых постов')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('is_read', models.BooleanField(default=False, verbose_name='Прочитано')),
+                ('last_post', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-window'],
+                'unique_together': {('user', 'window')},
+            },
+        ),
+    ]
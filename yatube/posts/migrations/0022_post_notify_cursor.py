@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-19 20:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_post_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='notify_cursor',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,8 +1,17 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.template.defaultfilters import linebreaksbr
 User = get_user_model()
 
 
+def render_text(text):
+    '''
+    HTML текста поста или комментария: то же, что text|linebreaksbr
+    в шаблоне, но считается один раз при сохранении.
+    '''
+    return str(linebreaksbr(text))
+
+
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
@@ -12,10 +21,24 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        '''
+        Всё, что выводит include/post_list.html, одним запросом.
+        Посты удалённых (неактивных) авторов не показываются.
+        '''
+        return self.filter(author__is_active=True).select_related(
+            'author', 'group').annotate(
+            comments_count=models.Count('comments')).order_by('-pub_date')
+
+
 class Post(models.Model):
+    is_archived = False
+
     text = models.TextField(verbose_name='Текст',
                             help_text='Текст поста')
-    pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    pub_date = models.DateTimeField('Дата публикации', auto_now_add=True,
+                                    db_index=True)
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
                                related_name='posts')
@@ -27,10 +50,37 @@ class Post(models.Model):
                               null=True,
                               related_name='posts')
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    views = models.PositiveIntegerField('Просмотры', default=0,
+                                        editable=False)
+    text_html = models.TextField(blank=True, editable=False)
+    # сведённые счётчики лайков, свежие приращения — в LikeCounterShard
+    likes = models.PositiveIntegerField('Лайки', default=0, editable=False)
+    # очередь рассылки: новые посты ждут process_notifications
+    notified = models.BooleanField(default=False, db_index=True,
+                                   editable=False)
+    # id последнего подписчика, чьё уведомление уже записано: повторный
+    # запуск после сбоя продолжает рассылку с него, а не с начала
+    notify_cursor = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    # меняются только через F() и update(): сохранение формы или
+    # админки не должно затирать их значением, прочитанным раньше
+    SERVICE_FIELDS = {'views', 'likes', 'notified', 'notify_cursor'}
 
     def __str__(self):
         return f'{self.author} | {self.text[:15]}'
 
+    def save(self, *args, **kwargs):
+        self.text_html = render_text(self.text)
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.SERVICE_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-pub_date']
 
@@ -44,11 +94,17 @@ class Comment(models.Model):
                                related_name='comments')
     text = models.TextField()
     created = models.DateTimeField('Дата комментария',
-                                   auto_now_add=True)
+                                   auto_now_add=True,
+                                   db_index=True)
+    text_html = models.TextField(blank=True, editable=False)
 
     def __str__(self):
         return f'{self.author} | {self.text[:15]}'
 
+    def save(self, *args, **kwargs):
+        self.text_html = render_text(self.text)
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-created']
 
@@ -63,3 +119,175 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ['user', 'author']
+
+
+class PostRevision(models.Model):
+    '''
+    Версия текста поста. Хранится сжатой zlib разницей с предыдущей
+    версией, а каждая POST_REVISION_SNAPSHOT_EVERY-я — целиком, чтобы
+    восстановление любой версии читало короткую цепочку, см.
+    posts/revisions.py.
+    '''
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='revisions')
+    number = models.PositiveIntegerField('Номер версии')
+    is_snapshot = models.BooleanField('Полная копия', default=False)
+    data = models.BinaryField()
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.post_id} | {self.number}'
+
+    class Meta:
+        ordering = ['-number']
+        unique_together = ['post', 'number']
+
+
+class Like(models.Model):
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='likes')
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='reactions')
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    class Meta:
+        unique_together = ['user', 'post']
+
+
+class LikeCounterShard(models.Model):
+    '''
+    Приращение счётчика лайков поста. Лайк пишет в случайный из
+    LIKE_COUNTER_SHARDS шардов, поэтому лайки вирусного поста не
+    упираются в одну строку; merge_likes сводит шарды в Post.likes.
+    '''
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='like_shards')
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['post', 'shard']
+
+
+class Notification(models.Model):
+    '''
+    Уведомление подписчику о новых постах. Все посты авторов, на которых
+    он подписан, за одно окно NOTIFICATION_WINDOW складываются в одну
+    запись со счётчиком.
+    '''
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='notifications')
+    window = models.DateTimeField('Начало окна')
+    count = models.PositiveIntegerField('Новых постов', default=0)
+    last_post = models.ForeignKey(Post,
+                                  on_delete=models.SET_NULL,
+                                  null=True,
+                                  related_name='+')
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+    is_read = models.BooleanField('Прочитано', default=False)
+
+    def __str__(self):
+        return f'{self.user} | {self.count}'
+
+    class Meta:
+        ordering = ['-window']
+        unique_together = ['user', 'window']
+
+
+class PurgeRequest(models.Model):
+    '''
+    Пользователь или группа, которые ждут удаления командой
+    purge_deleted, см. posts/purge.py.
+    '''
+    user = models.OneToOneField(User,
+                                on_delete=models.CASCADE,
+                                blank=True,
+                                null=True,
+                                related_name='purge_request')
+    group = models.OneToOneField(Group,
+                                 on_delete=models.CASCADE,
+                                 blank=True,
+                                 null=True,
+                                 related_name='purge_request')
+    created = models.DateTimeField('Дата запроса', auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.user or self.group}'
+
+
+class ArchivedPost(models.Model):
+    '''
+    Пост, перенесённый из горячей таблицы командой archive_posts.
+    Сохраняет исходный id, поэтому старые ссылки продолжают работать.
+    '''
+    is_archived = True
+
+    id = models.IntegerField(primary_key=True)
+    period = models.CharField('Период', max_length=7, db_index=True)
+    text = models.TextField(verbose_name='Текст')
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='archived_posts')
+    group = models.ForeignKey(Group,
+                              verbose_name='Группа',
+                              on_delete=models.SET_NULL,
+                              blank=True,
+                              null=True,
+                              related_name='archived_posts')
+    image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    views = models.PositiveIntegerField('Просмотры', default=0)
+    likes = models.PositiveIntegerField('Лайки', default=0)
+    text_html = models.TextField(blank=True)
+    archived = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    objects = PostQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.author} | {self.text[:15]}'
+
+    class Meta:
+        ordering = ['-pub_date']
+        indexes = [models.Index(fields=['author', '-pub_date'])]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(ArchivedPost,
+                             on_delete=models.CASCADE,
+                             related_name='comments')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='archived_comments')
+    text = models.TextField()
+    created = models.DateTimeField('Дата комментария')
+    text_html = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'{self.author} | {self.text[:15]}'
+
+    class Meta:
+        ordering = ['-created']
+
+
+class ArchivedPostRevision(models.Model):
+    '''Версия архивного поста, переносится вместе с ним.'''
+    post = models.ForeignKey(ArchivedPost,
+                             on_delete=models.CASCADE,
+                             related_name='revisions')
+    number = models.PositiveIntegerField('Номер версии')
+    is_snapshot = models.BooleanField('Полная копия', default=False)
+    data = models.BinaryField()
+    created = models.DateTimeField('Дата')
+
+    def __str__(self):
+        return f'{self.post_id} | {self.number}'
+
+    class Meta:
+        ordering = ['-number']
+        unique_together = ['post', 'number']
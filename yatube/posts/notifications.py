@@ -0,0 +1,134 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Post, Follow, Notification, User
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def window_start(moment):
+    '''Начало окна NOTIFICATION_WINDOW, в которое попадает moment.'''
+    seconds = settings.NOTIFICATION_WINDOW
+    timestamp = int(moment.timestamp()) // seconds * seconds
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+def process_batch(batch_size, chunk_size):
+    '''
+    Рассылает уведомления о пачке ещё не разосланных постов.
+    Подписчики получают одну запись на окно: если за окно уже есть
+    уведомление, у него растёт счётчик. Посты одного автора рассылаются
+    вместе, подписчики обходятся пачками по chunk_size, и каждая пачка
+    коммитится отдельно, чтобы не держать блокировку записи SQLite на
+    всю рассылку популярного автора. Возвращает число постов и
+    записанных уведомлений.
+
+    Рассчитано на один рабочий процесс: два параллельных
+    process_notifications могут разослать один пост дважды.
+    '''
+    window = window_start(timezone.now())
+    # посты удаляемых пользователей не рассылаются, их сотрёт purge
+    posts = list(
+        Post.objects.filter(notified=False, author__is_active=True)
+        .order_by('id')
+        .values_list('id', 'author_id', 'notify_cursor')[:batch_size])
+    if not posts:
+        return 0, 0
+    # у постов, рассылка которых прервалась, курсор уже сдвинут
+    groups = {}
+    for post_id, author_id, cursor in posts:
+        groups.setdefault((author_id, cursor), []).append(post_id)
+
+    notified = 0
+    created = []
+    for (author_id, cursor), post_ids in groups.items():
+        notified += notify_followers(
+            author_id, post_ids, cursor, window, chunk_size, created)
+
+    if settings.NOTIFICATION_EMAIL and created:
+        send_emails(created, chunk_size)
+    return len(posts), notified
+
+
+def notify_followers(author_id, post_ids, cursor, window, chunk_size,
+                     created):
+    '''
+    Уведомляет подписчиков автора с id больше cursor. Вместе с каждой
+    пачкой уведомлений в постах сохраняется новый курсор, так что
+    повторно обработанная после сбоя пачка не увеличит счётчики дважды.
+    '''
+    count, last_post_id = len(post_ids), max(post_ids)
+    followers = Follow.objects.filter(author_id=author_id).order_by(
+        'user_id').values_list('user_id', flat=True)
+    posts = Post.objects.filter(id__in=post_ids)
+    notified = 0
+    while True:
+        chunk = list(followers.filter(user_id__gt=cursor)[:chunk_size])
+        if not chunk:
+            break
+        cursor = chunk[-1]
+        with transaction.atomic():
+            created.extend(save_notifications(
+                chunk, count, last_post_id, window))
+            posts.update(notify_cursor=cursor)
+        notified += len(chunk)
+    posts.update(notified=True)
+    return notified
+
+
+def save_notifications(user_ids, count, last_post_id, window):
+    '''Добавляет count постов в уведомления user_ids, возвращает новые.'''
+    now = timezone.now()
+    existing = {
+        notification.user_id: notification
+        for notification in Notification.objects.filter(
+            window=window, user_id__in=user_ids)
+    }
+    new = []
+    for user_id in user_ids:
+        notification = existing.get(user_id)
+        if notification is None:
+            new.append(Notification(
+                user_id=user_id, window=window, count=count,
+                last_post_id=last_post_id))
+            continue
+        notification.count += count
+        notification.last_post_id = max(
+            notification.last_post_id or 0, last_post_id)
+        notification.is_read = False
+        # bulk_update не трогает auto_now
+        notification.updated = now
+    Notification.objects.bulk_create(new)
+    Notification.objects.bulk_update(
+        existing.values(), ['count', 'last_post', 'is_read', 'updated'])
+    return new
+
+
+def send_emails(notifications, chunk_size):
+    '''
+    Письмо уходит только при создании уведомления, то есть не чаще
+    одного раза за окно. Все письма идут через одно соединение.
+    '''
+    counts = {n.user_id: n.count for n in notifications}
+    link = settings.SITE_URL.rstrip('/') + reverse('notifications')
+    messages = []
+    for chunk in chunks(list(counts), chunk_size):
+        recipients = User.objects.filter(id__in=chunk).exclude(
+            email='').values_list('id', 'email')
+        for user_id, email in recipients:
+            messages.append(EmailMessage(
+                'Новые посты в Yatube',
+                f'Авторы, на которых вы подписаны, опубликовали новые '
+                f'посты: {counts[user_id]}.\nВсе уведомления: {link}',
+                to=[email]))
+    if messages:
+        with get_connection() as connection:
+            connection.send_messages(messages)
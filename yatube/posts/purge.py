@@ -0,0 +1,120 @@
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models.deletion import get_candidate_relations_to_delete
+from sorl.thumbnail import delete as delete_image
+
+from .models import PurgeRequest
+
+
+def schedule_purge(user=None, group=None):
+    '''
+    Мягкое удаление: пользователь сразу деактивируется и пропадает
+    из лент, группа — из адресов, а сами строки потом удаляет
+    manage.py purge_deleted.
+    '''
+    with transaction.atomic():
+        if user is not None:
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+        PurgeRequest.objects.get_or_create(user=user, group=group)
+
+
+def purge(instance, batch_size):
+    '''
+    Удаляет объект и всё, что на него ссылается, пачками по batch_size.
+    Каждая пачка удаляется отдельной транзакцией без загрузки объектов
+    (_raw_delete), поэтому база не блокируется надолго, а память не
+    растёт с числом постов. Возвращает число удалённых файлов.
+    '''
+    files = 0
+    for relation in get_candidate_relations_to_delete(instance._meta):
+        # запрос остаётся в очереди, пока не удалён сам объект: если
+        # команда упадёт на полпути, следующий запуск продолжит
+        if relation.related_model is PurgeRequest:
+            continue
+        files += clear_relation(relation, [instance.pk], batch_size)
+    # запрос и сам объект удаляются одной транзакцией
+    with transaction.atomic():
+        PurgeRequest.objects.filter(
+            **{instance._meta.model_name: instance.pk}).delete()
+        instance.delete()
+    return files
+
+
+def clear_relation(relation, pks, batch_size, names=None):
+    '''
+    Удаляет или обнуляет записи, ссылающиеся на pks через relation.
+    Снаружи транзакции каждая пачка коммитится отдельно, а файлы
+    удаляются после коммита; внутри — имена файлов копятся в names.
+    '''
+    field = relation.field
+    model = relation.related_model
+    queryset = model._base_manager.filter(**{f'{field.name}__in': pks})
+    on_delete = field.remote_field.on_delete
+    if on_delete is models.DO_NOTHING:
+        return 0
+    if on_delete not in (models.CASCADE, models.SET_NULL):
+        raise ValueError(
+            f'{model.__name__}.{field.name}: on_delete не поддерживается')
+    files = 0
+    while True:
+        chunk = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not chunk:
+            return files
+        if on_delete is models.SET_NULL:
+            model._base_manager.filter(pk__in=chunk).update(
+                **{field.name: None})
+        elif names is not None:
+            delete_rows(model, chunk, batch_size, names)
+        else:
+            deleted = set()
+            with transaction.atomic():
+                delete_rows(model, chunk, batch_size, deleted)
+            in_use = files_in_use({name for _, name in deleted})
+            for storage, name in deleted:
+                if name not in in_use:
+                    # сначала миниатюры sorl, потом сам файл
+                    delete_image(name, delete_file=False)
+                    storage.delete(name)
+            files += len(deleted)
+
+
+def delete_rows(model, pks, batch_size, names):
+    '''Удаляет строки с зависимыми записями, имена их файлов — в names.'''
+    for relation in get_candidate_relations_to_delete(model._meta):
+        clear_relation(relation, pks, batch_size, names)
+    queryset = model._base_manager.filter(pk__in=pks)
+    for field in model._meta.concrete_fields:
+        if isinstance(field, models.FileField):
+            names.update(
+                (field.storage, name)
+                for name in queryset.values_list(field.name, flat=True)
+                if name)
+    queryset._raw_delete(queryset.db)
+
+
+def files_in_use(names):
+    '''
+    Какие из names ещё упоминаются в базе: generate_dataset и архив
+    могут ссылаться на один файл. Один запрос на поле на всю пачку.
+    '''
+    in_use = set()
+    if not names:
+        return in_use
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                in_use.update(model._base_manager.filter(
+                    **{f'{field.name}__in': names}
+                ).values_list(field.name, flat=True).distinct())
+    return in_use
+
+
+def purge_pending(batch_size):
+    '''Выполняет все запросы на удаление, возвращает (объектов, файлов).'''
+    done = files = 0
+    requests = list(PurgeRequest.objects.select_related('user', 'group'))
+    for request in requests:
+        files += purge(request.user or request.group, batch_size)
+        done += 1
+    return done, files
@@ -0,0 +1,108 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    '''
+    Разбирает строку вида "10/m" или "100/5m" в пару
+    (ёмкость корзины, период пополнения в секундах).
+    '''
+    count, period = rate.split('/')
+    multiplier = int(period[:-1]) if period[:-1] else 1
+    return int(count), PERIODS[period[-1]] * multiplier
+
+
+def get_client_ip(request):
+    '''
+    За nginx REMOTE_ADDR — адрес прокси, общий для всех клиентов.
+    Для запросов от RATELIMIT_TRUSTED_PROXIES адрес берётся из
+    X-Forwarded-For: первый справа не доверенный, левее него значения
+    мог подставить сам клиент.
+    '''
+    remote_addr = request.META.get('REMOTE_ADDR', '')
+    trusted = settings.RATELIMIT_TRUSTED_PROXIES
+    if remote_addr not in trusted:
+        return remote_addr
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    for address in reversed(forwarded.split(',')):
+        address = address.strip()
+        if address and address not in trusted:
+            return address
+    return remote_addr
+
+
+def take_token(scope, ident, rate):
+    '''
+    Забирает один токен из корзины и возвращает число секунд
+    до пополнения, если корзина пуста, иначе None.
+
+    Корзина хранится в кэше счётчиком на текущий период: cache.add и
+    cache.incr атомарны, поэтому параллельные воркеры не могут выдать
+    больше токенов, чем задано ёмкостью.
+    '''
+    capacity, period = parse_rate(rate)
+    now = time.time()
+    window = int(now // period)
+    key = f'ratelimit:{scope}:{ident}:{window}'
+    # запас в одну секунду, чтобы счётчик не истёк раньше окна
+    if cache.add(key, 1, period + 1):
+        used = 1
+    else:
+        try:
+            used = cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, period + 1)
+            used = 1
+    if used > capacity:
+        return max(1, math.ceil((window + 1) * period - now))
+    return None
+
+
+def ratelimit(scope, methods=('POST',)):
+    '''
+    Ограничивает частоту вызова view отдельно для пользователя и IP.
+    Лимиты берутся из settings.RATELIMIT_RATES[scope].
+    При исчерпании любой из корзин возвращает 429 с Retry-After.
+    '''
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            rates = settings.RATELIMIT_RATES.get(scope, {})
+            if (not settings.RATELIMIT_ENABLE
+                    or (methods and request.method not in methods)):
+                return view_func(request, *args, **kwargs)
+            buckets = []
+            if request.user.is_authenticated and 'user' in rates:
+                buckets.append(
+                    (f'{scope}:user', request.user.pk, rates['user']))
+            if 'ip' in rates:
+                buckets.append(
+                    (f'{scope}:ip', get_client_ip(request), rates['ip']))
+            retry_after = None
+            for bucket_scope, ident, rate in buckets:
+                wait = take_token(bucket_scope, ident, rate)
+                if wait is not None:
+                    retry_after = max(wait, retry_after or 0)
+            if retry_after is not None:
+                return too_many_requests(request, retry_after)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def too_many_requests(request, retry_after):
+    response = render(
+        request,
+        'misc/429.html',
+        {'retry_after': retry_after},
+        status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
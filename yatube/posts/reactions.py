@@ -0,0 +1,116 @@
+import random
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from .models import Post, Like, LikeCounterShard
+
+
+def toggle_like(user, post_id):
+    '''Ставит или снимает лайк, возвращает True, если лайк поставлен.'''
+    with transaction.atomic():
+        deleted, _ = Like.objects.filter(user=user, post_id=post_id).delete()
+        if deleted:
+            add_to_counter(post_id, -1)
+            return False
+        try:
+            with transaction.atomic():
+                Like.objects.create(user=user, post_id=post_id)
+        except IntegrityError:
+            # параллельный запрос того же пользователя успел раньше
+            return True
+        add_to_counter(post_id, 1)
+        return True
+
+
+def add_to_counter(post_id, delta):
+    shard = random.randrange(settings.LIKE_COUNTER_SHARDS)
+    shards = LikeCounterShard.objects.filter(post_id=post_id, shard=shard)
+    if shards.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            LikeCounterShard.objects.create(
+                post_id=post_id, shard=shard, count=delta)
+    except IntegrityError:
+        shards.update(count=F('count') + delta)
+
+
+def pending_likes(post_ids):
+    '''Ещё не сведённые приращения: {post_id: delta}, одним запросом.'''
+    return dict(
+        LikeCounterShard.objects.filter(post_id__in=post_ids)
+        .values_list('post_id').annotate(total=Sum('count'))
+        .order_by())
+
+
+def liked_posts(user, post_ids):
+    '''Какие из постов лайкнул user, одним запросом.'''
+    if not user or not user.is_authenticated or not post_ids:
+        return set()
+    return set(Like.objects.filter(
+        user=user, post_id__in=post_ids).values_list('post_id', flat=True))
+
+
+def annotate_likes(posts, user):
+    '''
+    Проставляет постам страницы likes_total и liked: два запроса
+    на всю страницу вместо двух на каждый пост.
+    '''
+    ids = [post.id for post in posts if not post.is_archived]
+    pending = pending_likes(ids) if ids else {}
+    liked = liked_posts(user, ids)
+    for post in posts:
+        post.likes_total = post.likes + pending.get(post.id, 0)
+        post.liked = post.id in liked
+    return posts
+
+
+def like_states(post_ids, user):
+    '''
+    Свежие likes_total и liked для постов по id — для карточек из
+    закэшированного фрагмента, где сами посты не загружались.
+    Два запроса на любое число постов.
+    '''
+    posts = list(
+        Post.objects.filter(pk__in=post_ids)
+        .select_related('author').only('likes', 'author__username')
+        .annotate(pending=Sum('like_shards__count')).order_by())
+    liked = liked_posts(user, post_ids)
+    for post in posts:
+        post.likes_total = post.likes + (post.pending or 0)
+        post.liked = post.id in liked
+    return posts
+
+
+def merge_batch(batch_size):
+    '''
+    Сводит шарды пачки постов в Post.likes одним UPDATE и удаляет их.
+    Возвращает число постов.
+    '''
+    with transaction.atomic():
+        post_ids = list(
+            LikeCounterShard.objects.order_by('post_id')
+            .values_list('post_id', flat=True).distinct()[:batch_size])
+        if not post_ids:
+            return 0
+        # строки шардов блокируются до конца транзакции, а удаляются
+        # ровно те, что сложены: приращение, пришедшее после чтения,
+        # останется в новой строке и сведётся следующей пачкой
+        shards = list(
+            LikeCounterShard.objects.select_for_update()
+            .filter(post_id__in=post_ids)
+            .values_list('pk', 'post_id', 'count'))
+        totals = {}
+        for _, post_id, count in shards:
+            totals[post_id] = totals.get(post_id, 0) + count
+        deltas = Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in totals.items()],
+            default=Value(0),
+            output_field=IntegerField()
+        )
+        Post.objects.filter(pk__in=post_ids).update(likes=F('likes') + deltas)
+        LikeCounterShard.objects.filter(
+            pk__in=[pk for pk, _, _ in shards]).delete()
+    return len(post_ids)
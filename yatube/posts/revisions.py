@@ -0,0 +1,109 @@
+import difflib
+import json
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+from .models import PostRevision
+
+
+def make_delta(old, new):
+    '''
+    Разница по строкам: ["=", начало, конец] — взять строки старой
+    версии, ["+", [строки]] — вставить новые.
+    '''
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(['=', i1, i2])
+        elif j2 > j1:
+            ops.append(['+', new_lines[j1:j2]])
+    return ops
+
+
+def apply_delta(old, ops):
+    old_lines = old.splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if op[0] == '=':
+            parts.extend(old_lines[op[1]:op[2]])
+        else:
+            parts.extend(op[1])
+    return ''.join(parts)
+
+
+def pack(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False).encode())
+
+
+def unpack(data):
+    return json.loads(zlib.decompress(bytes(data)).decode())
+
+
+def record_revision(post, old_text):
+    '''
+    Сохраняет новую версию после правки поста. При первой правке
+    сначала сохраняется исходный текст, иначе его не восстановить.
+    '''
+    if old_text == post.text:
+        return None
+    with transaction.atomic():
+        last = post.revisions.aggregate(number=Max('number'))['number']
+        if last is None:
+            PostRevision.objects.create(
+                post=post, number=1, is_snapshot=True, data=pack(old_text))
+            last = 1
+        number = last + 1
+        if (number - 1) % settings.POST_REVISION_SNAPSHOT_EVERY == 0:
+            return PostRevision.objects.create(
+                post=post, number=number, is_snapshot=True,
+                data=pack(post.text))
+        return PostRevision.objects.create(
+            post=post, number=number,
+            data=pack(make_delta(old_text, post.text)))
+
+
+def revision_text(post, number):
+    '''
+    Текст версии number: ближайшая полная копия не новее её
+    и разницы после неё — не больше POST_REVISION_SNAPSHOT_EVERY версий.
+    '''
+    revisions = post.revisions.filter(number__lte=number)
+    start = revisions.filter(is_snapshot=True).aggregate(
+        number=Max('number'))['number']
+    if start is None:
+        return None
+    chain = revisions.filter(number__gte=start).order_by('number')
+    text = revision = None
+    for revision in chain.only('number', 'is_snapshot', 'data'):
+        value = unpack(revision.data)
+        text = value if revision.is_snapshot else apply_delta(text, value)
+    if revision is None or revision.number != number:
+        return None
+    return text
+
+
+def compact(post_id, keep):
+    '''
+    Оставляет у поста keep последних версий; самая старая из
+    оставшихся переписывается полной копией, чтобы цепочка не рвалась.
+    Возвращает число удалённых версий.
+    '''
+    revisions = PostRevision.objects.filter(post_id=post_id)
+    last = revisions.aggregate(number=Max('number'))['number']
+    if last is None or last <= keep:
+        return 0
+    first_kept = last - keep + 1
+    with transaction.atomic():
+        oldest = revisions.get(number=first_kept)
+        if not oldest.is_snapshot:
+            oldest.data = pack(revision_text(oldest.post, first_kept))
+            oldest.is_snapshot = True
+            oldest.save(update_fields=['data', 'is_snapshot'])
+        deleted, _ = revisions.filter(number__lt=first_kept).delete()
+    return deleted
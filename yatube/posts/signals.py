@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .live import publish_post
+from .models import Post
+
+
+@receiver(post_save, sender=Post)
+def push_new_post(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: publish_post(instance))
@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def lock_key(key):
+    return f'{key}:lock'
+
+
+def get_or_refresh(key, compute, timeout):
+    '''
+    Возвращает значение из кэша, а по истечении timeout пересчитывает
+    его с защитой от «толпы»: пересчитывает только тот запрос, который
+    взял блокировку, а остальные ещё STALE_CACHE_GRACE секунд получают
+    старое значение. Если значения нет совсем, остальные немного ждут
+    результата первого запроса.
+    '''
+    entry = cache.get(key)
+    now = time.time()
+    if entry is not None:
+        value, fresh_until = entry
+        if fresh_until > now or not _lock(key):
+            return value
+        return _refresh(key, compute, timeout)
+
+    if _lock(key):
+        return _refresh(key, compute, timeout)
+    deadline = now + settings.STALE_CACHE_WAIT
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    # тот, кто держит блокировку, не успел — считаем сами, но не пишем
+    return compute()
+
+
+def _lock(key):
+    return cache.add(lock_key(key), 1, settings.STALE_CACHE_LOCK_TIMEOUT)
+
+
+def _refresh(key, compute, timeout):
+    try:
+        value = compute()
+        cache.set(
+            key, (value, time.time() + timeout),
+            timeout + settings.STALE_CACHE_GRACE)
+        return value
+    finally:
+        cache.delete(lock_key(key))
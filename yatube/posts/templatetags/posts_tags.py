@@ -0,0 +1,107 @@
+import re
+
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from ..models import Post, ArchivedPost
+from ..reactions import annotate_likes, like_states
+from ..stale_cache import get_or_refresh
+
+register = template.Library()
+
+LIKE_MARKER = re.compile(r'<!--like:(\d+)-->')
+
+
+@register.inclusion_tag('include/post_list.html', takes_context=True)
+def post_list(context, posts, defer_likes=False):
+    '''
+    Выводит карточки постов: страницу, список или один пост.
+    Лайки для всех карточек подгружаются разом, см. annotate_likes;
+    с defer_likes=True вместо них ставятся метки для {% like_buttons %}.
+    '''
+    if isinstance(posts, (Post, ArchivedPost)):
+        posts = [posts]
+    user = context.get('user')
+    posts = list(posts)
+    return {
+        'posts': posts if defer_likes else annotate_likes(posts, user),
+        'defer_likes': defer_likes,
+        'user': user,
+        'request': context.get('request'),
+    }
+
+
+class LikeButtonsNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        html = self.nodelist.render(context)
+        ids = {int(post_id) for post_id in LIKE_MARKER.findall(html)}
+        if not ids:
+            return html
+        posts = {
+            post.id: post for post in like_states(ids, context.get('user'))}
+        widget = context.template.engine.get_template('include/like.html')
+
+        def replace(match):
+            post = posts.get(int(match.group(1)))
+            if post is None:
+                return ''
+            with context.push(post=post):
+                return widget.render(context)
+        return LIKE_MARKER.sub(replace, html)
+
+
+@register.tag
+def like_buttons(parser, token):
+    '''
+    Подставляет лайки в карточки, выведенные {% post_list page
+    defer_likes=True %}: счётчик и кнопка зависят от пользователя и
+    меняются чаще, чем кэшируется фрагмент ленты, поэтому считаются
+    на каждый запрос.
+
+        {% like_buttons %}
+            {% stale_cache 20 index_page ... %}...{% endstale_cache %}
+        {% endlike_buttons %}
+    '''
+    nodelist = parser.parse(('endlike_buttons',))
+    parser.delete_first_token()
+    return LikeButtonsNode(nodelist)
+
+
+class StaleCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        timeout = int(self.timeout.resolve(context))
+        key = make_template_fragment_key(
+            self.fragment_name,
+            [var.resolve(context) for var in self.vary_on])
+        return get_or_refresh(
+            key, lambda: self.nodelist.render(context), timeout)
+
+
+@register.tag
+def stale_cache(parser, token):
+    '''
+    Как {% cache %}, но после истечения срока отдаёт старый фрагмент,
+    пока один запрос строит новый, см. posts/stale_cache.py:
+
+        {% stale_cache 20 index_page request.user.username page.number %}
+            ...
+        {% endstale_cache %}
+    '''
+    nodelist = parser.parse(('endstale_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]!r} tag requires at least 2 arguments.')
+    return StaleCacheNode(
+        nodelist, parser.compile_filter(tokens[1]), tokens[2],
+        [parser.compile_filter(bit) for bit in tokens[3:]])
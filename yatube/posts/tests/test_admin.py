@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post, User, Comment, Follow
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        # пользователь сессии попадает в кэш при первом запросе
+        self.client.get(reverse('admin:index'))
+
+    def add_rows(self, count):
+        for i in range(count):
+            author = self.authors[i % len(self.authors)]
+            post = Post.objects.create(text=f'Пост {i}', author=author)
+            Comment.objects.create(post=post, author=author, text='Ок')
+        Follow.objects.get_or_create(
+            user=self.authors[0], author=self.authors[1])
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_queries_do_not_grow_with_rows(self):
+        for model in ('post', 'comment', 'follow'):
+            with self.subTest(model=model):
+                url = reverse(f'admin:posts_{model}_changelist')
+                self.add_rows(3)
+                before = self.queries(url)
+                self.add_rows(12)
+                self.assertEqual(self.queries(url), before)
+
+    def test_search_by_exact_username_and_id(self):
+        self.add_rows(6)
+        url = reverse('admin:posts_post_changelist')
+        response = self.client.get(url, {'q': '@author1'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+        post = Post.objects.first()
+        response = self.client.get(url, {'q': str(post.pk)})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [post])
+        response = self.client.get(url, {'q': 'author'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_text_search_limited_to_recent_rows(self):
+        self.add_rows(6)
+        url = reverse('admin:posts_post_changelist')
+        response = self.client.get(url, {'q': 'Пост 5'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        with mock.patch('posts.admin.SEARCH_RECENT_ROWS', 3):
+            response = self.client.get(url, {'q': 'Пост 1'})
+        self.assertEqual(response.context['cl'].result_count, 0)
@@ -0,0 +1,67 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Post, User, Comment, ArchivedPost, ArchivedComment
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        self.old_posts = []
+        for i in range(3):
+            post = Post.objects.create(text=f'Старый {i}', author=self.user)
+            Comment.objects.create(post=post, author=self.user, text='Ок')
+            self.old_posts.append(post)
+        for i, post in enumerate(self.old_posts):
+            Post.objects.filter(id=post.id).update(
+                pub_date=timezone.now() - timedelta(days=400 - i))
+        self.new_posts = [
+            Post.objects.create(text=f'Новый {i}', author=self.user)
+            for i in range(settings.PAGINATOR_PER_PAGE_VAL)
+        ]
+        call_command('archive_posts', batch_size=2, stdout=StringIO())
+
+    def test_old_posts_moved(self):
+        self.assertEqual(Post.objects.count(), len(self.new_posts))
+        self.assertEqual(ArchivedPost.objects.count(), 3)
+        self.assertEqual(ArchivedComment.objects.count(), 3)
+        self.assertEqual(Comment.objects.count(), 0)
+        archived = ArchivedPost.objects.get(id=self.old_posts[0].id)
+        self.assertEqual(archived.text, self.old_posts[0].text)
+        self.assertEqual(archived.period, archived.pub_date.strftime('%Y-%m'))
+
+    def test_post_view_falls_back_to_archive(self):
+        post = self.old_posts[0]
+        response = Client().get(reverse('post', kwargs={
+            'username': self.user.username,
+            'post_id': post.id
+        }))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context['post'].text, post.text)
+        self.assertEqual(len(response.context['comments']), 1)
+
+    def test_missing_post_is_404(self):
+        response = Client().get(reverse('post', kwargs={
+            'username': self.user.username,
+            'post_id': 100500
+        }))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_profile_continues_with_archive(self):
+        url = reverse('profile', kwargs={'username': self.user.username})
+        response = Client().get(url)
+        self.assertEqual(response.context['page'].paginator.count, 13)
+        response = Client().get(url + '?page=2')
+        texts = [post.text for post in response.context['page']]
+        self.assertEqual(texts, ['Старый 2', 'Старый 1', 'Старый 0'])
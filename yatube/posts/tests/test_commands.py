@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core import mail
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Post, Group, User, Comment, Follow
+
+
+class GenerateDatasetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        settings.MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_generate_dataset(self):
+        call_command(
+            'generate_dataset',
+            users=30, groups=3, posts=200, comments=300,
+            follows_per_user=5, image_ratio=0.2, batch_size=64,
+            stdout=StringIO()
+        )
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertTrue(Follow.objects.exists())
+        self.assertFalse(
+            Follow.objects.filter(user_id=F('author_id')).exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+
+
+class RenderHtmlTests(TestCase):
+    def test_backfill(self):
+        user = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(text=f'строка {i}\nещё', author=user) for i in range(5))
+        call_command('render_html', batch_size=2, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(text_html='').exists())
+        post = Post.objects.get(text='строка 4\nещё')
+        self.assertEqual(post.text_html, 'строка 4<br>ещё')
+
+
+class SendDigestsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(
+                username=f'reader{i}', email=f'r{i}@example.com')
+            for i in range(5)
+        ]
+        User.objects.create_user(username='no_email')
+        Follow.objects.bulk_create(
+            Follow(user=reader, author=cls.author)
+            for reader in cls.readers[:4])
+        for i in range(3):
+            Post.objects.create(text=f'Пост {i}', author=cls.author)
+
+    def setUp(self):
+        self.checkpoint = tempfile.mktemp()
+
+    @override_settings(SITE_URL='https://yatube.example/')
+    def test_digests_sent_to_followers(self):
+        call_command('send_digests', batch_size=2, limit=2,
+                     checkpoint=self.checkpoint, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 4)
+        body = mail.outbox[0].body
+        self.assertIn('Пост 2', body)
+        self.assertNotIn('Пост 0', body)
+        self.assertIn('показаны 2 из 3', body)
+        self.assertIn('https://yatube.example/author/', body)
+        self.assertEqual(mail.outbox[0].to, [self.readers[0].email])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resume(self):
+        with open(self.checkpoint, 'w') as file:
+            json.dump({
+                'since': (timezone.now() - timedelta(hours=1)).isoformat(),
+                'last_user_id': self.readers[1].id,
+            }, file)
+        call_command('send_digests', resume=True,
+                     checkpoint=self.checkpoint, stdout=StringIO())
+        self.assertEqual(
+            [message.to[0] for message in mail.outbox],
+            [reader.email for reader in self.readers[2:4]])
@@ -0,0 +1,61 @@
+import os
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from .. import counters
+from ..models import Post, User
+
+
+class ViewCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Текст', author=cls.user)
+        cls.other = Post.objects.create(text='Другой', author=cls.user)
+
+    def setUp(self):
+        counters.flush()
+
+    @override_settings(VIEW_COUNTER_FLUSH_INTERVAL=3600)
+    def test_views_are_buffered(self):
+        url = reverse('post', kwargs={
+            'username': self.user.username,
+            'post_id': self.post.id
+        })
+        for _ in range(3):
+            response = Client().get(url)
+        self.assertEqual(response.context['views'], 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+
+    @override_settings(VIEW_COUNTER_FLUSH_INTERVAL=3600)
+    def test_flush_writes_aggregated_deltas(self):
+        for _ in range(3):
+            counters.record_view(self.post.id)
+        counters.record_view(self.other.id)
+        self.assertEqual(counters.flush(), 2)
+        self.post.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.post.views, 3)
+        self.assertEqual(self.other.views, 1)
+        self.assertEqual(counters.pending_views(self.post.id), 0)
+
+    @override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0)
+    def test_flush_when_interval_elapsed(self):
+        counters.record_view(self.post.id)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+
+    def test_exit_flush_skips_other_database(self):
+        counters.record_view(self.post.id)
+        path = os.path.join(os.path.dirname(__file__), 'other.sqlite3')
+        with mock.patch.dict(connection.settings_dict, NAME=path):
+            counters._flush_on_exit()
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(counters.pending_views(self.post.id), 1)
+        # буфер сбрасывается в базу этого теста и откатывается с ней
+        counters.flush()
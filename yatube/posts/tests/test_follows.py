@@ -0,0 +1,73 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import User, Follow, Post
+
+
+class FollowBatchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='migrant')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}')
+            for i in range(30)
+        ]
+        Follow.objects.create(user=cls.user, author=cls.authors[0])
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.client.get(reverse('about:author'))
+
+    def post_json(self, data):
+        return self.client.post(
+            reverse('follow_batch'), json.dumps(data),
+            content_type='application/json')
+
+    def test_json_batch(self):
+        usernames = [author.username for author in self.authors]
+        usernames += ['migrant', 'nobody', 'author1']
+        with CaptureQueriesContext(connection) as context:
+            response = self.post_json({'usernames': usernames})
+        self.assertEqual(response.json(), {
+            'requested': len(usernames), 'found': 30, 'followed': 29})
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 30)
+        # имена, подсчёт до и после и одна вставка, независимо от числа имён
+        self.assertLessEqual(len(context), 6)
+
+    def test_form_batch(self):
+        response = self.client.post(
+            reverse('follow_batch'), {'usernames': '@author1, author2\n'})
+        self.assertEqual(response.json()['followed'], 2)
+
+    def test_bad_payload(self):
+        response = self.post_json({'usernames': 'author1'})
+        self.assertEqual(response.status_code, 400)
+        with self.settings(FOLLOW_BATCH_LIMIT=2):
+            response = self.post_json({'usernames': ['a', 'b', 'c']})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unfollow_refreshes_feed(self):
+        Post.objects.create(text='Пост автора', author=self.authors[0])
+        self.assertContains(
+            self.client.get(reverse('follow_index')), 'Пост автора')
+        self.client.get(
+            reverse('profile_unfollow', args=[self.authors[0].username]))
+        self.assertNotContains(
+            self.client.get(reverse('follow_index')), 'Пост автора')
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt') as file:
+            file.write('author5\nauthor6 author7\n')
+            file.flush()
+            call_command('import_follows', 'migrant', file=file.name,
+                         stdout=StringIO())
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 4)
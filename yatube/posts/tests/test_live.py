@@ -0,0 +1,83 @@
+import json
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from ..live import Broker, Event, broker, publish_post, slots
+from ..models import Post, User, Follow
+
+
+class BrokerTests(TestCase):
+    def test_wait(self):
+        local = Broker(backlog=2)
+        self.assertEqual(local.wait(0, timeout=0.01), [])
+        for i in range(1, 4):
+            local.publish(Event(i, 1, str(i)))
+        self.assertEqual(local.last_id, 3)
+        self.assertEqual([e.id for e in local.wait(0, timeout=0)], [2, 3])
+        self.assertEqual([e.id for e in local.wait(2, timeout=0)], [3])
+
+
+@override_settings(SSE_MAX_LIFETIME=0.2, SSE_KEEPALIVE=0.05)
+class LiveViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        # id постов в тестах повторяются после отката транзакций
+        broker.events.clear()
+
+    def read(self, client, url, last_id):
+        response = client.get(url, HTTP_LAST_EVENT_ID=str(last_id))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def test_index_stream(self):
+        post = Post.objects.create(text='Живой пост', author=self.author)
+        publish_post(post)
+        client = Client()
+        client.force_login(self.reader)
+        body = self.read(client, reverse('index_live'), 0)
+        self.assertTrue(body.startswith('retry: '))
+        self.assertIn(': keepalive', body)
+        event = body.split(f'id: {post.id}\nevent: post\ndata: ')[1]
+        data = json.loads(event.split('\n')[0])
+        self.assertEqual(data['author'], 'author')
+        self.assertIn('Живой пост', data['html'])
+
+    def test_follow_stream_filters_authors(self):
+        followed = Post.objects.create(text='Свой', author=self.author)
+        other = Post.objects.create(text='Чужой', author=self.stranger)
+        broker.publish(Event(followed.id, self.author.id, '{}'))
+        broker.publish(Event(other.id, self.stranger.id, '{}'))
+        client = Client()
+        client.force_login(self.reader)
+        body = self.read(client, reverse('follow_live'), 0)
+        self.assertIn(f'id: {followed.id}\n', body)
+        self.assertNotIn(f'id: {other.id}\n', body)
+
+    def test_streams_are_limited(self):
+        client = Client()
+        client.force_login(self.reader)
+        with override_settings(SSE_MAX_STREAMS=1):
+            slots.acquire()
+            try:
+                body = self.read(client, reverse('index_live'), 0)
+            finally:
+                slots.release()
+            self.assertEqual(body, 'retry: 30000\n\n')
+            self.read(client, reverse('index_live'), 0)
+        self.assertEqual(slots.active, 0)
+
+    def test_index_page_links_stream(self):
+        response = Client().get(reverse('index'))
+        self.assertNotContains(response, reverse('index_live'))
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('index'))
+        self.assertContains(response, reverse('index_live'))
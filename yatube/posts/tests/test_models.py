@@ -49,3 +49,14 @@ class PostsModelsTest(TestCase):
     def test_group_str(self):
         group = PostsModelsTest.group
         self.assertEqual(str(group), group.title)
+
+    def test_text_html_rendered_on_save(self):
+        post = Post.objects.create(
+            text='<b>первая</b>\nвторая',
+            author=PostsModelsTest.user
+        )
+        self.assertEqual(
+            post.text_html, '&lt;b&gt;первая&lt;/b&gt;<br>вторая')
+        post.text = 'новый'
+        post.save()
+        self.assertEqual(post.text_html, 'новый')
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Post, User, Follow, Notification
+from ..notifications import process_batch, save_notifications
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.followers = [
+            User.objects.create_user(
+                username=f'follower{i}', email=f'f{i}@example.com')
+            for i in range(5)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=user, author=cls.author) for user in cls.followers)
+        Follow.objects.create(user=cls.followers[0], author=cls.other)
+
+    def test_new_post_is_queued_not_sent(self):
+        client = Client()
+        client.force_login(self.author)
+        client.post(reverse('new_post'), {'text': 'Новый пост'})
+        self.assertFalse(Post.objects.get().notified)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_posts_coalesced_per_window(self):
+        Post.objects.create(text='Первый', author=self.author)
+        Post.objects.create(text='Второй', author=self.other)
+        call_command('process_notifications', chunk_size=2, stdout=StringIO())
+        last = Post.objects.create(text='Третий', author=self.author)
+        posts, users = process_batch(batch_size=10, chunk_size=2)
+        self.assertEqual((posts, users), (1, 5))
+        self.assertFalse(Post.objects.filter(notified=False).exists())
+        self.assertEqual(Notification.objects.count(), 5)
+        first = Notification.objects.get(user=self.followers[0])
+        self.assertEqual(first.count, 3)
+        self.assertEqual(first.last_post, last)
+        self.assertEqual(
+            Notification.objects.get(user=self.followers[1]).count, 2)
+
+    def test_interrupted_run_resumes(self):
+        post = Post.objects.create(text='Первый', author=self.author)
+        calls = []
+
+        def fail_second_chunk(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+            return save_notifications(*args)
+
+        with mock.patch('posts.notifications.save_notifications',
+                        side_effect=fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                process_batch(batch_size=10, chunk_size=2)
+        # первая пачка закоммичена, курсор сохранён
+        self.assertEqual(Notification.objects.count(), 2)
+        post.refresh_from_db()
+        self.assertFalse(post.notified)
+        self.assertEqual(process_batch(batch_size=10, chunk_size=2), (1, 3))
+        self.assertEqual(
+            list(Notification.objects.values_list('count', flat=True)),
+            [1] * 5)
+
+    def test_edit_does_not_requeue(self):
+        post = Post.objects.create(text='Первый', author=self.author)
+        process_batch(batch_size=10, chunk_size=2)
+        client = Client()
+        client.force_login(self.author)
+        client.post(
+            reverse('post_edit', args=[self.author.username, post.id]),
+            {'text': 'Исправленный'})
+        post.refresh_from_db()
+        self.assertTrue(post.notified)
+        self.assertEqual(process_batch(batch_size=10, chunk_size=2), (0, 0))
+        self.assertEqual(
+            Notification.objects.get(user=self.followers[0]).count, 1)
+
+    def test_stale_save_keeps_queue_state(self):
+        post = Post.objects.create(text='Первый', author=self.author)
+        stale = Post.objects.get(pk=post.pk)
+        process_batch(batch_size=10, chunk_size=2)
+        # например, админка с формой, открытой до рассылки
+        stale.text = 'Исправленный'
+        stale.save()
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Исправленный')
+        self.assertTrue(post.notified)
+
+    def test_next_window_gets_new_notification(self):
+        Post.objects.create(text='Первый', author=self.author)
+        process_batch(batch_size=10, chunk_size=10)
+        Post.objects.create(text='Второй', author=self.author)
+        later = timezone.now() + timedelta(
+            seconds=settings.NOTIFICATION_WINDOW)
+        with mock.patch('posts.notifications.timezone.now',
+                        return_value=later):
+            process_batch(batch_size=10, chunk_size=10)
+        self.assertEqual(
+            Notification.objects.filter(user=self.followers[1]).count(), 2)
+
+    @override_settings(NOTIFICATION_EMAIL=True,
+                       SITE_URL='https://yatube.example',
+                       EMAIL_BACKEND='django.core.mail.backends.locmem.'
+                                     'EmailBackend')
+    def test_email_once_per_window(self):
+        Post.objects.create(text='Первый', author=self.author)
+        process_batch(batch_size=10, chunk_size=2)
+        Post.objects.create(text='Второй', author=self.author)
+        process_batch(batch_size=10, chunk_size=2)
+        self.assertEqual(len(mail.outbox), len(self.followers))
+        self.assertIn(
+            'https://yatube.example' + reverse('notifications'),
+            mail.outbox[0].body)
+
+    def test_inbox_marks_read(self):
+        Post.objects.create(text='Первый', author=self.author)
+        process_batch(batch_size=10, chunk_size=10)
+        client = Client()
+        client.force_login(self.followers[0])
+        response = client.get(reverse('notifications'))
+        self.assertEqual(len(response.context['page']), 1)
+        self.assertEqual(len(response.context['unread']), 1)
+        self.assertFalse(Notification.objects.filter(
+            user=self.followers[0], is_read=False).exists())
@@ -0,0 +1,155 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import (
+    Post, Group, User, Comment, Follow, Notification, PurgeRequest,
+    ArchivedPost)
+from ..notifications import process_batch
+from ..purge import clear_relation, files_in_use, schedule_purge
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C\x0A\x00\x3B'
+)
+
+
+class PurgeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        settings.MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='leaving')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='-')
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=self.user, group=self.group,
+                image=SimpleUploadedFile(
+                    f'small{i}.gif', SMALL_GIF, content_type='image/gif'))
+            for i in range(5)
+        ]
+        self.kept = Post.objects.create(
+            text='Чужой пост', author=self.reader, group=self.group)
+        Comment.objects.create(post=self.kept, author=self.user, text='Ок')
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Ок')
+        Follow.objects.create(user=self.reader, author=self.user)
+        Notification.objects.create(
+            user=self.reader, window=self.kept.pub_date,
+            last_post=self.posts[0], count=1)
+        ArchivedPost.objects.create(
+            id=100500, period='2020-01', text='Старый', author=self.user,
+            pub_date=self.kept.pub_date)
+
+    def test_soft_delete_hides_content(self):
+        schedule_purge(user=self.user)
+        client = Client()
+        response = client.get(reverse('index'))
+        self.assertEqual(
+            [post.text for post in response.context['page']],
+            ['Чужой пост'])
+        response = client.get(
+            reverse('profile', kwargs={'username': self.user.username}))
+        self.assertEqual(response.status_code, 404)
+        response = client.get(reverse('post', kwargs={
+            'username': self.reader.username, 'post_id': self.kept.id}))
+        self.assertEqual(len(response.context['comments']), 0)
+
+    def test_soft_delete_stops_mailings(self):
+        schedule_purge(user=self.user)
+        # разослан только пост читателя, у которого нет подписчиков
+        self.assertEqual(process_batch(batch_size=10, chunk_size=10), (1, 0))
+        self.assertEqual(Notification.objects.get().count, 1)
+        self.reader.email = 'reader@example.com'
+        self.reader.save()
+        call_command('send_digests', checkpoint=tempfile.mktemp(),
+                     stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_purge_user(self):
+        images = [post.image.path for post in self.posts]
+        schedule_purge(user=self.user)
+        call_command('purge_deleted', batch_size=2, stdout=StringIO())
+        self.assertFalse(User.objects.filter(username='leaving').exists())
+        self.assertEqual(list(Post.objects.all()), [self.kept])
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(PurgeRequest.objects.exists())
+        self.assertIsNone(Notification.objects.get().last_post)
+        for path in images:
+            self.assertFalse(os.path.exists(path))
+
+    def test_shared_file_is_kept(self):
+        Post.objects.filter(pk=self.kept.pk).update(
+            image=self.posts[0].image.name)
+        schedule_purge(user=self.user)
+        call_command('purge_deleted', batch_size=2, stdout=StringIO())
+        self.assertTrue(os.path.exists(self.posts[0].image.path))
+        self.assertFalse(os.path.exists(self.posts[1].image.path))
+
+    def test_files_in_use_checks_batch_at_once(self):
+        names = {post.image.name for post in self.posts}
+        # по запросу на Post.image и ArchivedPost.image
+        with self.assertNumQueries(2):
+            self.assertEqual(files_in_use(names | {'posts/gone.gif'}), names)
+
+    def test_failed_purge_can_resume(self):
+        schedule_purge(user=self.user)
+
+        def fail_on_archive(relation, *args):
+            if relation.related_model is ArchivedPost:
+                raise RuntimeError('сбой')
+            return clear_relation(relation, *args)
+
+        with mock.patch('posts.purge.clear_relation',
+                        side_effect=fail_on_archive):
+            with self.assertRaises(RuntimeError):
+                call_command('purge_deleted', stdout=StringIO())
+        self.assertTrue(PurgeRequest.objects.filter(user=self.user).exists())
+        call_command('purge_deleted', stdout=StringIO())
+        self.assertFalse(User.objects.filter(username='leaving').exists())
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(PurgeRequest.objects.exists())
+
+    def test_purge_group(self):
+        schedule_purge(group=self.group)
+        response = Client().get(
+            reverse('group', kwargs={'slug': self.group.slug}))
+        self.assertEqual(response.status_code, 404)
+        call_command('purge_deleted', batch_size=2, stdout=StringIO())
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.count(), 6)
+        self.assertFalse(Post.objects.filter(group__isnull=False).exists())
+
+    def test_admin_delete_schedules_purge(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin')
+        client = Client()
+        client.force_login(admin)
+        client.post(
+            reverse('admin:auth_user_delete', args=[self.user.pk]),
+            {'post': 'yes'})
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertTrue(PurgeRequest.objects.filter(user=self.user).exists())
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 5)
@@ -0,0 +1,137 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post, Group, User, Comment, Follow
+
+AUTHORS = 20
+GROUPS = 5
+POSTS_PER_AUTHOR = 15
+COMMENTS_PER_POST = 3
+
+
+def rows_fetched(queries):
+    '''
+    Сколько строк вернули SELECT-запросы: каждый запрос
+    повторяется как SELECT COUNT(*) FROM (...).
+    '''
+    total = 0
+    with connection.cursor() as cursor:
+        for query in queries:
+            sql = query['sql']
+            if not sql.upper().startswith('SELECT'):
+                continue
+            cursor.execute(f'SELECT COUNT(*) FROM ({sql})')
+            total += cursor.fetchone()[0]
+    return total
+
+
+class QueryBudgetTests(TestCase):
+    '''
+    Бюджеты SQL-запросов и прочитанных строк для каждой страницы.
+    Если изменение их превышает — скорее всего, появился N+1.
+    '''
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = User.objects.bulk_create(
+            User(username=f'author{i}') for i in range(AUTHORS))
+        authors = list(User.objects.filter(username__startswith='author'))
+        groups = Group.objects.bulk_create(
+            Group(title=f'Группа {i}', slug=f'group{i}', description='-')
+            for i in range(GROUPS))
+        groups = list(Group.objects.all())
+        Post.objects.bulk_create(
+            Post(
+                text=f'Пост {i}\nвторая строка',
+                author=authors[i % AUTHORS],
+                group=groups[i % GROUPS] if i % 3 else None,
+            )
+            for i in range(AUTHORS * POSTS_PER_AUTHOR))
+        posts = list(Post.objects.all())
+        Comment.objects.bulk_create(
+            Comment(
+                post=post,
+                author=authors[(post.id + j) % AUTHORS],
+                text=f'Комментарий {j}',
+            )
+            for post in posts for j in range(COMMENTS_PER_POST))
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.bulk_create(
+            Follow(user=cls.reader, author=author)
+            for author in authors[:AUTHORS // 2])
+        Follow.objects.bulk_create(
+            Follow(user=follower, author=author)
+            for follower in authors[:5] for author in authors[5:10])
+        cls.author = authors[0]
+        cls.post = Post.objects.filter(author=cls.author).first()
+        cls.group = groups[0]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+        # сессия и пользователь уже в кэше, как у постоянного посетителя
+        self.client.get(reverse('about:author'))
+
+    def assertBudget(self, method, url, max_queries, max_rows, data=None):
+        with CaptureQueriesContext(connection) as context:
+            getattr(self.client, method)(url, data or {})
+        queries = context.captured_queries
+        self.assertLessEqual(
+            len(queries), max_queries,
+            '\n'.join(query['sql'] for query in queries)
+        )
+        self.assertLessEqual(rows_fetched(queries), max_rows)
+
+    def test_index(self):
+        # лайки карточек читаются заново и при попадании в кэш фрагмента
+        self.assertBudget('get', reverse('index'), 4, 21)
+
+    def test_index_last_page(self):
+        self.assertBudget('get', reverse('index') + '?page=30', 4, 21)
+
+    def test_group_posts(self):
+        self.assertBudget(
+            'get', reverse('group', kwargs={'slug': self.group.slug}), 5, 12)
+
+    def test_profile(self):
+        self.assertBudget(
+            'get',
+            reverse('profile', kwargs={'username': self.author.username}),
+            10, 17
+        )
+
+    def test_post_view(self):
+        self.assertBudget(
+            'get',
+            reverse('post', kwargs={
+                'username': self.author.username,
+                'post_id': self.post.id
+            }),
+            # +1 UPDATE, если запрос попал на сброс счётчиков просмотров
+            8, 7
+        )
+
+    def test_follow_index(self):
+        self.assertBudget('get', reverse('follow_index'), 4, 21)
+
+    def test_new_post_form(self):
+        self.assertBudget('get', reverse('new_post'), 1, 5)
+
+    def test_new_post_submit(self):
+        self.assertBudget(
+            'post', reverse('new_post'), 1, 0, {'text': 'Новый пост'})
+
+    def test_add_comment(self):
+        self.assertBudget(
+            'post',
+            reverse('add_comment', kwargs={
+                'username': self.author.username,
+                'post_id': self.post.id
+            }),
+            2, 1,
+            {'text': 'Комментарий'}
+        )
@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.urls import reverse
+
+from ..models import Post, User
+from ..ratelimit import get_client_ip, parse_rate
+
+
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='spammer')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('100/5m'), (100, 300))
+        self.assertEqual(parse_rate('1/d'), (1, 86400))
+
+    @override_settings(RATELIMIT_RATES={'new_post': {'user': '2/m'}})
+    def test_new_post_user_limit(self):
+        for _ in range(2):
+            self.client.post(reverse('new_post'), {'text': 'Текст'})
+        response = self.client.post(reverse('new_post'), {'text': 'Текст'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertTrue(int(response['Retry-After']) > 0)
+        self.assertEqual(Post.objects.count(), 2)
+
+    @override_settings(RATELIMIT_RATES={'new_post': {'user': '1/m'}})
+    def test_get_does_not_take_tokens(self):
+        for _ in range(3):
+            response = self.client.get(reverse('new_post'))
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(RATELIMIT_RATES={'profile_follow': {'ip': '1/m'}})
+    def test_follow_ip_limit(self):
+        url = reverse('profile_follow', kwargs={'username': 'author'})
+        self.client.get(url)
+        other = Client()
+        other.force_login(self.author)
+        response = other.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    @override_settings(RATELIMIT_TRUSTED_PROXIES=['10.0.0.1'])
+    def test_client_ip_behind_proxy(self):
+        factory = RequestFactory()
+        request = factory.get('/', REMOTE_ADDR='10.0.0.1',
+                              HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2')
+        # 1.1.1.1 мог подставить клиент, 2.2.2.2 записал nginx
+        self.assertEqual(get_client_ip(request), '2.2.2.2')
+        request = factory.get('/', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(get_client_ip(request), '10.0.0.1')
+        request = factory.get('/', REMOTE_ADDR='3.3.3.3',
+                              HTTP_X_FORWARDED_FOR='2.2.2.2')
+        self.assertEqual(get_client_ip(request), '3.3.3.3')
+
+    @override_settings(RATELIMIT_TRUSTED_PROXIES=['127.0.0.1'],
+                       RATELIMIT_RATES={'profile_follow': {'ip': '1/m'}})
+    def test_ip_limit_per_forwarded_client(self):
+        url = reverse('profile_follow', kwargs={'username': 'author'})
+        self.client.get(url, HTTP_X_FORWARDED_FOR='1.1.1.1')
+        other = Client()
+        other.force_login(self.author)
+        response = other.get(url, HTTP_X_FORWARDED_FOR='2.2.2.2')
+        self.assertNotEqual(
+            response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    @override_settings(RATELIMIT_ENABLE=False,
+                       RATELIMIT_RATES={'new_post': {'user': '1/m'}})
+    def test_disabled(self):
+        for _ in range(3):
+            self.client.post(reverse('new_post'), {'text': 'Текст'})
+        self.assertEqual(Post.objects.count(), 3)
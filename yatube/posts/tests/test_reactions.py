@@ -0,0 +1,123 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_batch
+from ..forms import PostForm
+from ..models import Post, User, Like, LikeCounterShard, ArchivedPost
+from ..reactions import toggle_like
+
+
+class ReactionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{i}')
+            for i in range(20)
+        ]
+
+    def setUp(self):
+        self.post = Post.objects.create(text='Пост', author=self.author)
+
+    def test_toggle(self):
+        self.assertTrue(toggle_like(self.readers[0], self.post.id))
+        self.assertFalse(toggle_like(self.readers[0], self.post.id))
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(
+            sum(LikeCounterShard.objects.values_list('count', flat=True)), 0)
+
+    def test_merge(self):
+        for reader in self.readers:
+            toggle_like(reader, self.post.id)
+        self.assertLessEqual(
+            LikeCounterShard.objects.count(), settings.LIKE_COUNTER_SHARDS)
+        call_command('merge_likes', batch_size=1, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes, 20)
+        self.assertFalse(LikeCounterShard.objects.exists())
+
+    def test_feed_lookup_is_batched(self):
+        posts = [self.post] + [
+            Post.objects.create(text=f'Ещё {i}', author=self.author)
+            for i in range(5)
+        ]
+        for post in posts[:3]:
+            toggle_like(self.readers[0], post.id)
+        template = Template('{% load posts_tags %}{% post_list posts %}')
+        # посты, несведённые лайки и «мои лайки» — по одному запросу
+        with self.assertNumQueries(3):
+            html = template.render(Context({
+                'posts': Post.objects.for_feed(),
+                'user': self.readers[0],
+            }))
+        self.assertEqual(html.count('btn-danger"'), 3)
+        self.assertEqual(html.count('&#9829; 1'), 3)
+
+    def test_like_view(self):
+        client = Client()
+        client.force_login(self.readers[0])
+        url = reverse('like', kwargs={
+            'username': self.author.username, 'post_id': self.post.id})
+        response = client.post(url, {'next': '/?page=2'})
+        self.assertRedirects(
+            response, '/?page=2', fetch_redirect_response=False)
+        response = client.post(url, {'next': 'https://evil.example/'})
+        self.assertRedirects(
+            response,
+            reverse('post', kwargs={
+                'username': self.author.username, 'post_id': self.post.id}),
+            fetch_redirect_response=False)
+        self.assertFalse(Like.objects.exists())
+
+    def test_like_shows_on_cached_index(self):
+        client = Client()
+        client.force_login(self.readers[0])
+        client.get(reverse('index'))
+        client.post(
+            reverse('like', args=[self.author.username, self.post.id]),
+            {'next': '/'})
+        response = client.get(reverse('index'))
+        self.assertContains(response, 'btn-danger"')
+        self.assertContains(response, '&#9829; 1')
+
+    def test_unlike_after_merge(self):
+        toggle_like(self.readers[0], self.post.id)
+        call_command('merge_likes', stdout=StringIO())
+        toggle_like(self.readers[0], self.post.id)
+        client = Client()
+        client.force_login(self.readers[0])
+        response = client.get(reverse('profile', args=[self.author.username]))
+        self.assertContains(response, '&#9829; 0')
+        self.assertNotContains(response, '&#9829; 1')
+
+    def test_edit_keeps_merged_likes(self):
+        toggle_like(self.readers[0], self.post.id)
+        is_valid = PostForm.is_valid
+
+        def merge_then_validate(form):
+            # сведение лайков между загрузкой поста и его сохранением
+            call_command('merge_likes', stdout=StringIO())
+            return is_valid(form)
+
+        client = Client()
+        client.force_login(self.author)
+        url = reverse('post_edit', args=[self.author.username, self.post.id])
+        with mock.patch.object(PostForm, 'is_valid', merge_then_validate):
+            client.post(url, {'text': 'Правка'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Правка')
+        self.assertEqual(self.post.likes, 1)
+
+    def test_archive_keeps_likes(self):
+        toggle_like(self.readers[0], self.post.id)
+        archive_batch(timezone.now() + timedelta(days=1), 10)
+        self.assertEqual(ArchivedPost.objects.get().likes, 1)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_batch
+from ..models import ArchivedPost, Post, PostRevision, User
+from ..revisions import revision_text
+
+
+@override_settings(POST_REVISION_SNAPSHOT_EVERY=3)
+class RevisionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.texts = ['Первая строка\nВторая строка\nТретья строка']
+        self.post = Post.objects.create(text=self.texts[0], author=self.author)
+
+    def edit(self, text):
+        self.client.post(
+            reverse('post_edit', args=[self.author.username, self.post.id]),
+            {'text': text})
+        self.texts.append(text)
+
+    def test_every_version_is_restored(self):
+        for i in range(7):
+            self.edit(f'Первая строка\nПравка {i}\nТретья строка')
+        self.edit(self.texts[-1])
+        self.texts.pop()
+        revisions = PostRevision.objects.filter(post=self.post)
+        self.assertEqual(revisions.count(), 8)
+        self.assertEqual(
+            list(revisions.filter(is_snapshot=True).order_by(
+                'number').values_list('number', flat=True)),
+            [1, 4, 7])
+        for number, text in enumerate(self.texts, 1):
+            self.assertEqual(revision_text(self.post, number), text)
+
+    def test_history_page(self):
+        self.edit('Новый текст')
+        url = reverse(
+            'post_history', args=[self.author.username, self.post.id])
+        response = self.client.get(url, {'revision': 1})
+        self.assertContains(response, 'Вторая строка')
+        self.assertContains(response, 'Версия 2')
+        response = self.client.get(url, {'revision': 5})
+        self.assertEqual(response.status_code, 404)
+
+    def test_history_only_for_author_and_staff(self):
+        self.edit('Новый текст')
+        url = reverse(
+            'post_history', args=[self.author.username, self.post.id])
+        self.assertEqual(Client().get(url).status_code, 404)
+        client = Client()
+        client.force_login(User.objects.create_user(username='reader'))
+        self.assertEqual(client.get(url, {'revision': 1}).status_code, 404)
+        client.force_login(
+            User.objects.create_user(username='staff', is_staff=True))
+        self.assertContains(client.get(url, {'revision': 1}), 'Вторая строка')
+
+    def test_compact(self):
+        for i in range(5):
+            self.edit(f'Текст\nправка {i}')
+        call_command('compact_revisions', keep=2, stdout=StringIO())
+        revisions = PostRevision.objects.filter(post=self.post)
+        self.assertEqual(
+            list(revisions.values_list('number', 'is_snapshot')),
+            [(6, False), (5, True)])
+        self.assertEqual(revision_text(self.post, 5), self.texts[4])
+        self.assertEqual(revision_text(self.post, 6), self.texts[5])
+
+    def test_archive_keeps_revisions(self):
+        self.edit('Правка')
+        self.edit('Ещё правка')
+        archive_batch(timezone.now() + timedelta(days=1), 10)
+        archived = ArchivedPost.objects.get()
+        self.assertEqual(archived.revisions.count(), 3)
+        self.assertEqual(revision_text(archived, 1), self.texts[0])
+        self.assertEqual(revision_text(archived, 3), 'Ещё правка')
+        response = self.client.get(
+            reverse('post_history', args=[self.author.username, archived.id]),
+            {'revision': 2})
+        self.assertContains(response, 'Правка')
@@ -0,0 +1,66 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from ..stale_cache import get_or_refresh, lock_key
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f'значение {self.calls}'
+
+
+class StaleCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.compute = Counter()
+
+    def later(self, seconds):
+        return mock.patch(
+            'posts.stale_cache.time.time',
+            return_value=time.time() + seconds)
+
+    def test_fresh_value_not_recomputed(self):
+        get_or_refresh('key', self.compute, 20)
+        self.assertEqual(get_or_refresh('key', self.compute, 20), 'значение 1')
+        self.assertEqual(self.compute.calls, 1)
+
+    def test_expired_value_refreshed_once(self):
+        get_or_refresh('key', self.compute, 20)
+        with self.later(30):
+            self.assertEqual(
+                get_or_refresh('key', self.compute, 20), 'значение 2')
+        self.assertFalse(cache.has_key(lock_key('key')))
+
+    def test_stale_value_served_while_locked(self):
+        get_or_refresh('key', self.compute, 20)
+        cache.add(lock_key('key'), 1)
+        with self.later(30):
+            self.assertEqual(
+                get_or_refresh('key', self.compute, 20), 'значение 1')
+        self.assertEqual(self.compute.calls, 1)
+
+    @override_settings(STALE_CACHE_WAIT=0)
+    def test_missing_value_computed_when_lock_not_released(self):
+        cache.add(lock_key('key'), 1)
+        self.assertEqual(get_or_refresh('key', self.compute, 20), 'значение 1')
+        self.assertIsNone(cache.get('key'))
+
+    def test_template_tag(self):
+        template = Template(
+            '{% load posts_tags %}'
+            '{% stale_cache 20 fragment number %}{{ value }}'
+            '{% endstale_cache %}')
+        self.assertEqual(
+            template.render(Context({'number': 1, 'value': 'a'})), 'a')
+        self.assertEqual(
+            template.render(Context({'number': 1, 'value': 'b'})), 'a')
+        self.assertEqual(
+            template.render(Context({'number': 2, 'value': 'b'})), 'b')
@@ -1,3 +1,4 @@
+import re
 import shutil
 import tempfile
 
@@ -10,6 +11,9 @@ from django import forms
 
 from ..models import Post, Group, User, Follow
 
+# кнопки лайков рендерятся вне кэша, а маска CSRF-токена каждый раз новая
+CSRF_TOKEN = re.compile(rb'name="csrfmiddlewaretoken" value="[^"]*"')
+
 
 class PostPagesTests(TestCase):
     @classmethod
@@ -142,22 +146,35 @@ class PostPagesTests(TestCase):
         self.check_post_context_on_page(response.context['post'])
         self.assertEqual(response.context['user'], self.user)
 
+    def test_post_list_renders_every_post(self):
+        cache.clear()
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.user) for i in range(3))
+        response = self.authorized_client.get(reverse('index'))
+        self.assertTemplateUsed(response, 'include/post_list.html')
+        for post in response.context['page']:
+            self.assertContains(response, f'name="post_{post.id}"')
+
     def check_post_context_on_page(self, post_object):
         self.assertEqual(post_object.author, self.user)
         self.assertEqual(post_object.text, self.post.text)
         self.assertEqual(post_object.group, self.post.group)
         self.assertEqual(post_object.image, self.post.image)
 
+    def get_index(self):
+        content = self.authorized_client.get(reverse('index')).content
+        return CSRF_TOKEN.sub(b'', content)
+
     def test_cache(self):
-        index_page = self.authorized_client.get(reverse('index')).content
+        index_page = self.get_index()
         self.authorized_client.post(
             reverse('new_post'),
             {'text': 'Новый пост'}
         )
-        page_before = self.authorized_client.get(reverse('index')).content
+        page_before = self.get_index()
         self.assertEqual(page_before, index_page)
         cache.clear()
-        page_after = self.authorized_client.get(reverse('index')).content
+        page_after = self.get_index()
         self.assertNotEqual(page_after, index_page)
 
     def test_follow(self):
@@ -4,9 +4,13 @@ from . import views
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('live/', views.index_live, name='index_live'),
     path('new/', views.new_post, name='new_post'),
     path('group/<slug:slug>/', views.group_posts, name='group'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/live/', views.follow_live, name='follow_live'),
+    path('follow/batch/', views.follow_batch, name='follow_batch'),
+    path('notifications/', views.notifications, name='notifications'),
     path('<str:username>/follow/',
          views.profile_follow,
          name='profile_follow'),
@@ -21,4 +25,10 @@ urlpatterns = [
     path('<str:username>/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'),
+    path('<str:username>/<int:post_id>/like/',
+         views.like_post,
+         name='like'),
+    path('<str:username>/<int:post_id>/history/',
+         views.post_history,
+         name='post_history'),
 ]
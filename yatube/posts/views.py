@@ -1,27 +1,42 @@
+import json
+
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.utils.http import is_safe_url
+from django.views.decorators.http import require_POST
 from django.conf import settings
 
-from .models import Post, Group, User, Follow
+from yatube.routers import writes_data
+
+from .archive import ChainedQuerySets
+from .models import Post, Group, User, Follow, ArchivedPost, Notification
+from .counters import record_view, pending_views
+from .follows import follow_many, parse_usernames, refresh_timeline
+from .live import broker, event_stream
 from .forms import PostForm, CommentForm
+from .ratelimit import ratelimit
+from .reactions import toggle_like
+from .revisions import record_revision, revision_text
 
 
 def index(request):
-    post_list = Post.objects.all()
+    post_list = Post.objects.for_feed()
     paginator = Paginator(post_list, settings.PAGINATOR_PER_PAGE_VAL)
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
     return render(
         request,
         'index.html',
-        {'page': page}
+        {'page': page, 'live_after': broker.last_id}
     )
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    group = get_object_or_404(
+        Group, slug=slug, purge_request__isnull=True)
+    post_list = Post.objects.for_feed().filter(group=group)
     paginator = Paginator(post_list, settings.PAGINATOR_PER_PAGE_VAL)
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
@@ -33,8 +48,12 @@ def group_posts(request, slug):
 
 
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=user)
+    user = get_object_or_404(User, username=username, is_active=True)
+    # архивные посты идут после всех постов из горячей таблицы
+    posts = ChainedQuerySets(
+        Post.objects.for_feed().filter(author=user),
+        ArchivedPost.objects.for_feed().filter(author=user)
+    )
     paginator = Paginator(posts, settings.PAGINATOR_PER_PAGE_VAL)
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
@@ -51,19 +70,43 @@ def profile(request, username):
 
 
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, pk=post_id, author__username=username)
+    post = Post.objects.for_feed().filter(
+        pk=post_id, author__username=username).first()
+    if post is None:
+        return archived_post_view(request, username, post_id)
     form = CommentForm()
-    comments = post.comments.all()
+    comments = post.comments.filter(
+        author__is_active=True).select_related('author')
+    record_view(post.id)
     context = {
         'author': post.author,
         'post': post,
         'comments': comments,
-        'form': form
+        'form': form,
+        'views': post.views + pending_views(post.id),
+    }
+    return render(request, 'post.html', context)
+
+
+def archived_post_view(request, username, post_id):
+    post = get_object_or_404(
+        ArchivedPost.objects.for_feed(),
+        pk=post_id,
+        author__username=username
+    )
+    context = {
+        'author': post.author,
+        'post': post,
+        'comments': post.comments.filter(
+            author__is_active=True).select_related('author'),
+        'form': None,
+        'views': post.views,
     }
     return render(request, 'post.html', context)
 
 
 @login_required
+@ratelimit('new_post')
 def new_post(request):
     form = PostForm()
     if request.method == 'POST':
@@ -81,12 +124,17 @@ def post_edit(request, username, post_id):
     post = get_object_or_404(Post, pk=post_id, author__username=username)
     if request.user != post.author:
         return redirect('post', username=username, post_id=post_id)
+    old_text = post.text
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
         instance=post)
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        # счётчики и очередь рассылки меняются только через F() и
+        # update(), полная запись строки затёрла бы их свежие значения
+        post.save(update_fields=['text', 'text_html', 'group', 'image'])
+        record_revision(post, old_text)
         return redirect(
             'post',
             username=request.user.username,
@@ -98,6 +146,7 @@ def post_edit(request, username, post_id):
 
 
 @login_required
+@ratelimit('add_comment')
 def add_comment(request, username, post_id):
     post = get_object_or_404(Post, pk=post_id, author__username=username)
     if request.method == 'POST':
@@ -110,6 +159,50 @@ def add_comment(request, username, post_id):
     return redirect('post', username=username, post_id=post_id)
 
 
+def post_history(request, username, post_id):
+    '''Прежние версии видят только автор и сотрудники.'''
+    post = Post.objects.for_feed().filter(
+        pk=post_id, author__username=username).first()
+    if post is None:
+        post = get_object_or_404(
+            ArchivedPost.objects.for_feed(),
+            pk=post_id,
+            author__username=username
+        )
+    if request.user != post.author and not request.user.is_staff:
+        raise Http404
+    revisions = post.revisions.only('number', 'is_snapshot', 'created')
+    number = request.GET.get('revision')
+    text = None
+    if number and number.isdigit():
+        text = revision_text(post, int(number))
+        if text is None:
+            raise Http404
+        number = int(number)
+    context = {
+        'author': post.author,
+        'post': post,
+        'revisions': revisions,
+        'number': number,
+        'text': text,
+    }
+    return render(request, 'history.html', context)
+
+
+@login_required
+@require_POST
+@ratelimit('like')
+def like_post(request, username, post_id):
+    post = get_object_or_404(Post, pk=post_id, author__username=username)
+    toggle_like(request.user, post.id)
+    next_url = request.POST.get('next')
+    if next_url and is_safe_url(
+            next_url, allowed_hosts={request.get_host()},
+            require_https=request.is_secure()):
+        return redirect(next_url)
+    return redirect('post', username=username, post_id=post_id)
+
+
 def page_not_found(request, exception):
     return render(
         request,
@@ -125,26 +218,107 @@ def server_error(request):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = Post.objects.for_feed().filter(
+        author__following__user=request.user)
     paginator = Paginator(post_list, settings.PAGINATOR_PER_PAGE_VAL)
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
-    return render(request, 'follow.html', {'page': page})
+    return render(
+        request, 'follow.html', {'page': page, 'live_after': broker.last_id})
+
+
+def live_response(request, authors=None):
+    # после переподключения браузер сам присылает Last-Event-ID
+    last_id = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get(
+        'after')
+    try:
+        last_id = int(last_id)
+    except (TypeError, ValueError):
+        last_id = broker.last_id
+    response = StreamingHttpResponse(
+        event_stream(last_id, authors), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # иначе nginx копит поток в буфере
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def index_live(request):
+    return live_response(request)
+
+
+@login_required
+def follow_live(request):
+    authors = set(Follow.objects.filter(
+        user=request.user).values_list('author_id', flat=True))
+    return live_response(request, authors)
 
 
 @login_required
+def notifications(request):
+    notification_list = Notification.objects.filter(
+        user=request.user).select_related('last_post__author')
+    paginator = Paginator(notification_list, settings.PAGINATOR_PER_PAGE_VAL)
+    page_number = request.GET.get('page')
+    page = paginator.get_page(page_number)
+    unread = [n.id for n in page if not n.is_read]
+    if unread:
+        Notification.objects.filter(id__in=unread).update(is_read=True)
+    return render(
+        request, 'notifications.html', {'page': page, 'unread': unread})
+
+
+@login_required
+@ratelimit('profile_follow', methods=None)
+@writes_data
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    if request.user != author and not Follow.objects.filter(
-            user=request.user,
-            author=author).exists():
-        Follow.objects.create(user=request.user, author=author)
+    author = get_object_or_404(User, username=username, is_active=True)
+    if request.user != author:
+        Follow.objects.bulk_create(
+            [Follow(user=request.user, author=author)],
+            ignore_conflicts=True)
+        refresh_timeline(request.user)
     return redirect('follow_index')
 
 
 @login_required
+@require_POST
+@ratelimit('follow_batch')
+def follow_batch(request):
+    '''
+    Подписка сразу на много авторов: JSON {"usernames": [...]}
+    или поле формы usernames со списком имён.
+    '''
+    if request.content_type == 'application/json':
+        try:
+            usernames = json.loads(request.body)['usernames']
+        except (ValueError, KeyError, TypeError):
+            usernames = None
+        if not isinstance(usernames, list) or not all(
+                isinstance(name, str) for name in usernames):
+            return JsonResponse(
+                {'error': 'Ожидается {"usernames": ["имя", ...]}'},
+                status=400)
+    else:
+        usernames = parse_usernames(request.POST.get('usernames', ''))
+    if len(usernames) > settings.FOLLOW_BATCH_LIMIT:
+        return JsonResponse(
+            {'error': f'Не больше {settings.FOLLOW_BATCH_LIMIT} имён'},
+            status=400)
+    found, followed = follow_many(request.user, usernames)
+    return JsonResponse({
+        'requested': len(usernames),
+        'found': found,
+        'followed': followed,
+    })
+
+
+@login_required
+@writes_data
 def profile_unfollow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=user, author=author).delete()
+    refresh_timeline(user)
     return redirect('follow_index')
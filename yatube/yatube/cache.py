@@ -0,0 +1,243 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+)
+
+
+class SQLiteCache(BaseCache):
+    '''
+    Кэш в файле SQLite, общий для всех воркеров на одной машине.
+    Запись видна остальным процессам сразу после коммита, add и incr
+    атомарны между процессами. Внешний сервер не нужен.
+
+    Перед файлом стоит небольшой кэш в памяти процесса (L1): прочитанное
+    значение живёт в нём не дольше L1_TIMEOUT секунд, поэтому изменения
+    из другого воркера видны с задержкой не больше этого срока.
+    Как и LocMemCache, L1 хранит pickle и отдаёт каждому вызову свою
+    копию, чтобы потоки не делили и не меняли один объект.
+    L1_TIMEOUT = 0 отключает L1.
+    '''
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = location
+        self.l1_timeout = float(options.get('L1_TIMEOUT', 1))
+        self.l1_max_entries = int(options.get('L1_MAX_ENTRIES', 1000))
+        self._l1 = {}
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        # соединение своё у каждого потока и у каждого процесса после fork
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.connection = self._connect()
+            local.pid = os.getpid()
+            self._l1.clear()
+        return local.connection
+
+    def _connect(self):
+        connection = sqlite3.connect(
+            self.path, timeout=5, isolation_level=None,
+            check_same_thread=False)
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.execute('PRAGMA synchronous = NORMAL')
+        for statement in SCHEMA:
+            connection.execute(statement)
+        return connection
+
+    def _l1_get(self, key):
+        item = self._l1.get(key)
+        if item is None:
+            return None
+        if item[1] < time.monotonic():
+            self._l1.pop(key, None)
+            return None
+        return item
+
+    def _l1_set(self, key, blob):
+        if not self.l1_timeout:
+            return
+        if len(self._l1) >= self.l1_max_entries:
+            self._l1.clear()
+        self._l1[key] = (blob, time.monotonic() + self.l1_timeout)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        item = self._l1_get(key)
+        if item is not None:
+            return pickle.loads(item[0])
+        row = self.connection.execute(
+            'SELECT value FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time())).fetchone()
+        if row is None:
+            return default
+        self._l1_set(key, row[0])
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        made = {self._key(key, version): key for key in keys}
+        result = {}
+        missing = []
+        for key, original in made.items():
+            item = self._l1_get(key)
+            if item is None:
+                missing.append(key)
+            else:
+                result[original] = pickle.loads(item[0])
+        # не упираемся в лимит параметров SQLite
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            rows = self.connection.execute(
+                'SELECT key, value FROM cache WHERE key IN ({}) '
+                'AND (expires IS NULL OR expires > ?)'.format(
+                    ', '.join('?' * len(chunk))),
+                chunk + [time.time()])
+            for key, blob in rows:
+                self._l1_set(key, blob)
+                result[made[key]] = pickle.loads(blob)
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = []
+        for key, value in data.items():
+            key = self._key(key, version)
+            self._l1.pop(key, None)
+            rows.append((
+                key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires))
+        connection = self.connection
+        with self._transaction(connection):
+            connection.executemany(
+                'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET '
+                'value = excluded.value, expires = excluded.expires',
+                rows)
+            self._cull(connection)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        connection = self.connection
+        with self._transaction(connection):
+            # перезаписываем только просроченную запись
+            cursor = connection.execute(
+                'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET '
+                'value = excluded.value, expires = excluded.expires '
+                'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                 self.get_backend_timeout(timeout), time.time()))
+            added = cursor.rowcount > 0
+            if added:
+                self._l1.pop(key, None)
+                self._cull(connection)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        connection = self.connection
+        with self._transaction(connection):
+            row = connection.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, time.time())).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key))
+        self._l1.pop(key, None)
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        cursor = self.connection.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()))
+        return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        if self._l1_get(key) is not None:
+            return True
+        return self.connection.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time())).fetchone() is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        for key in keys:
+            self._l1.pop(key, None)
+        connection = self.connection
+        with self._transaction(connection):
+            connection.executemany(
+                'DELETE FROM cache WHERE key = ?', [(key,) for key in keys])
+
+    def clear(self):
+        self._l1.clear()
+        self.connection.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # соединение держим открытым: открывать файл на каждый запрос дорого
+        pass
+
+    def _transaction(self, connection):
+        return _Immediate(connection)
+
+    def _cull(self, connection):
+        '''Удаляет просроченное, а при переполнении — часть самых старых.'''
+        connection.execute(
+            'DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?',
+            (time.time(),))
+        count = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count <= self._max_entries:
+            return
+        if not self._cull_frequency:
+            connection.execute('DELETE FROM cache')
+            return
+        connection.execute(
+            'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+            'ORDER BY expires IS NULL, expires LIMIT ?)',
+            (count // self._cull_frequency,))
+
+
+class _Immediate:
+    '''
+    BEGIN IMMEDIATE сразу берёт блокировку на запись, поэтому
+    чтение и запись внутри (incr, add) атомарны между процессами.
+    '''
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute('COMMIT' if exc_type is None else 'ROLLBACK')
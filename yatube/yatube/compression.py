@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+
+class CompressionMiddleware(GZipMiddleware):
+    '''
+    GZipMiddleware только для HTML и JSON и только начиная с
+    COMPRESS_MIN_SIZE байт: мелкие ответы и уже сжатые форматы
+    (картинки, предсжатая статика) сжимать невыгодно.
+
+    Потоковые ответы сжимаются на лету, Vary: Accept-Encoding
+    добавляется родительским классом, поэтому кэши не отдадут сжатую
+    версию клиенту без gzip. От BREACH защищает маскирование
+    CSRF-токена: Django выдаёт новую маску в каждом ответе.
+    '''
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type.strip() not in settings.COMPRESS_CONTENT_TYPES:
+            return response
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESS_MIN_SIZE):
+            return response
+        return super().process_response(request, response)
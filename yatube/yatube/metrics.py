@@ -0,0 +1,313 @@
+"""
+Метрики запросов в текстовом формате Prometheus.
+
+Каждый процесс копит гистограммы в памяти и раз в METRICS_FLUSH_INTERVAL
+секунд сбрасывает их в собственный файл в METRICS_DIR. Ручка /metrics
+складывает файлы всех воркеров, поэтому данные агрегируются по всем
+процессам без общего сервера и без блокировок на каждый запрос.
+Файлы завершившихся воркеров переносятся в archive.json, чтобы
+счётчики не убывали, а каталог не рос с каждым перезапуском.
+"""
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import Template
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+ARCHIVE_FILE = 'archive.json'
+
+HISTOGRAMS = {
+    'yatube_request_duration_seconds': (
+        'Время обработки запроса', LATENCY_BUCKETS),
+    'yatube_db_queries': (
+        'Количество SQL-запросов на запрос', QUERY_BUCKETS),
+    'yatube_db_duration_seconds': (
+        'Время выполнения SQL на запрос', LATENCY_BUCKETS),
+    'yatube_template_render_seconds': (
+        'Время рендера шаблонов на запрос', LATENCY_BUCKETS),
+}
+COUNTERS = {
+    'yatube_cache_hits_total': 'Попадания в кэш',
+    'yatube_cache_misses_total': 'Промахи кэша',
+}
+
+_local = threading.local()
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_last_flush = time.monotonic()
+_installed = False
+
+
+def current():
+    '''Метрики текущего запроса или None вне запроса.'''
+    return getattr(_local, 'request', None)
+
+
+def observe(name, view, value):
+    buckets = HISTOGRAMS[name][1]
+    with _lock:
+        series = _histograms.setdefault(name, {}).setdefault(view, {
+            'buckets': [0] * (len(buckets) + 1),
+            'sum': 0.0,
+            'count': 0,
+        })
+        series['buckets'][bisect_left(buckets, value)] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+
+def inc(name, view, value=1):
+    if not value:
+        return
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[view] = series.get(view, 0) + value
+
+
+def snapshot():
+    with _lock:
+        return {
+            'histograms': json.loads(json.dumps(_histograms)),
+            'counters': json.loads(json.dumps(_counters)),
+        }
+
+
+def process_file(pid=None):
+    return os.path.join(settings.METRICS_DIR, f'{pid or os.getpid()}.json')
+
+
+def flush():
+    '''Атомарно перезаписывает файл метрик текущего процесса.'''
+    global _last_flush
+    _last_flush = time.monotonic()
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = process_file()
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as fp:
+        json.dump(snapshot(), fp)
+    os.replace(tmp_path, path)
+
+
+def maybe_flush():
+    if time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+def merge(total, data):
+    for name, views in data.get('histograms', {}).items():
+        for view, series in views.items():
+            target = total['histograms'].setdefault(name, {}).setdefault(
+                view, {
+                    'buckets': [0] * len(series['buckets']),
+                    'sum': 0.0,
+                    'count': 0,
+                })
+            for i, count in enumerate(series['buckets']):
+                target['buckets'][i] += count
+            target['sum'] += series['sum']
+            target['count'] += series['count']
+    for name, views in data.get('counters', {}).items():
+        for view, value in views.items():
+            target = total['counters'].setdefault(name, {})
+            target[view] = target.get(view, 0) + value
+    return total
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def compact(path):
+    '''
+    Добавляет метрики завершившегося процесса в archive.json и удаляет
+    его файл. Блокировка не даёт двум процессам учесть файл дважды.
+    '''
+    archive = os.path.join(settings.METRICS_DIR, ARCHIVE_FILE)
+    lock_path = os.path.join(settings.METRICS_DIR, 'archive.lock')
+    with open(lock_path, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(path) as fp:
+                data = json.load(fp)
+        except FileNotFoundError:
+            # файл уже перенёс другой процесс
+            return
+        except ValueError:
+            data = {}
+        total = {'histograms': {}, 'counters': {}}
+        if os.path.exists(archive):
+            with open(archive) as fp:
+                merge(total, json.load(fp))
+        with open(f'{archive}.tmp', 'w') as fp:
+            json.dump(merge(total, data), fp)
+        os.replace(f'{archive}.tmp', archive)
+        os.remove(path)
+
+
+def prune():
+    '''Переносит в архив файлы процессов, которых больше нет.'''
+    for filename in os.listdir(settings.METRICS_DIR):
+        pid, extension = os.path.splitext(filename)
+        if extension == '.json' and pid.isdigit() and not is_alive(int(pid)):
+            compact(os.path.join(settings.METRICS_DIR, filename))
+
+
+def collect():
+    '''Складывает метрики всех процессов; свои берутся из памяти.'''
+    total = {'histograms': {}, 'counters': {}}
+    own = os.path.basename(process_file())
+    if os.path.isdir(settings.METRICS_DIR):
+        prune()
+        for filename in os.listdir(settings.METRICS_DIR):
+            if not filename.endswith('.json') or filename == own:
+                continue
+            try:
+                with open(os.path.join(settings.METRICS_DIR, filename)) as fp:
+                    merge(total, json.load(fp))
+            except (OSError, ValueError):
+                continue
+    return merge(total, snapshot())
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_text(data):
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for view, series in sorted(data['histograms'].get(name, {}).items()):
+            cumulative = 0
+            bounds = [str(b) for b in buckets] + ['+Inf']
+            for bound, count in zip(bounds, series['buckets']):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{view="{view}",le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(
+                f'{name}_sum{{view="{view}"}} {format_value(series["sum"])}')
+            lines.append(f'{name}_count{{view="{view}"}} {series["count"]}')
+    for name, help_text in COUNTERS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for view, value in sorted(data['counters'].get(name, {}).items()):
+            lines.append(f'{name}{{view="{view}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_text(collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def _count_queries(execute, sql, params, many, context):
+    state = current()
+    if state is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        state['queries'] += 1
+        state['db_time'] += time.perf_counter() - start
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        state = current()
+        # вложенные render() уже учтены во внешнем
+        if state is None or state['render_depth']:
+            return render(self, *args, **kwargs)
+        state['render_depth'] += 1
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            state['render_time'] += time.perf_counter() - start
+            state['render_depth'] -= 1
+    return wrapper
+
+
+def _counted_get(get):
+    def wrapper(self, key, default=None, version=None):
+        value = get(self, key, default, version)
+        state = current()
+        if state is not None:
+            state['cache_hits' if value is not default
+                  else 'cache_misses'] += 1
+        return value
+    return wrapper
+
+
+def install():
+    '''Один раз оборачивает рендер шаблонов и чтение из кэшей.'''
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    Template.render = _timed_render(Template.render)
+    for backend in {type(caches[alias]) for alias in settings.CACHES}:
+        backend.get = _counted_get(backend.get)
+    atexit.register(flush)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        _local.request = state = {
+            'queries': 0,
+            'db_time': 0.0,
+            'render_time': 0.0,
+            'render_depth': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+        }
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_count_queries))
+                response = self.get_response(request)
+        finally:
+            _local.request = None
+        elapsed = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else 'unresolved'
+        observe('yatube_request_duration_seconds', view, elapsed)
+        observe('yatube_db_queries', view, state['queries'])
+        observe('yatube_db_duration_seconds', view, state['db_time'])
+        observe('yatube_template_render_seconds', view,
+                state['render_time'])
+        inc('yatube_cache_hits_total', view, state['cache_hits'])
+        inc('yatube_cache_misses_total', view, state['cache_misses'])
+        maybe_flush()
+        return response
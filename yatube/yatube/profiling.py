@@ -0,0 +1,165 @@
+"""
+Профилирование отдельного запроса в продакшене.
+
+Сотрудник добавляет к адресу ?_profile=1 (или заголовок X-Profile: 1),
+и view выполняется под cProfile, а все SQL-запросы записываются с
+временем выполнения и планом (EXPLAIN). В PROFILING_DIR сохраняются
+файл pstats (для snakeviz, `python -m pstats`) и HTML-сводка, имя
+отчёта приходит в заголовке X-Profile-Report; ?_profile=html вместо
+страницы сразу возвращает сводку.
+
+Без параметра middleware только проверяет заголовок и параметр
+запроса: профилировщик не создаётся, обёрток вокруг SQL нет.
+"""
+import cProfile
+import os
+import pstats
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+# cProfile не умеет профилировать несколько потоков сразу
+_lock = threading.Lock()
+
+
+class QueryLog:
+    '''Execute-wrapper, запоминающий запросы текущего запроса.'''
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': self.alias,
+                'sql': sql,
+                'params': None if many else params,
+                'time': time.perf_counter() - start,
+            })
+
+
+def explain(query):
+    '''План SELECT-запроса или None для остальных.'''
+    sql = query['sql'].lstrip().upper()
+    if query['params'] is None or not sql.startswith('SELECT'):
+        return None
+    connection = connections[query['alias']]
+    prefix = (
+        'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN ')
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + query['sql'], query['params'])
+            rows = cursor.fetchall()
+    except Exception as error:
+        return f'не удалось получить план: {error}'
+    return '\n'.join(' '.join(str(value) for value in row) for row in rows)
+
+
+def top_functions(profiler, limit):
+    stats = pstats.Stats(profiler).sort_stats('cumulative')
+    functions = []
+    for func in stats.fcn_list[:limit]:
+        calls, total_calls, own_time, cumulative, _ = stats.stats[func]
+        filename, lineno, name = func
+        functions.append({
+            'name': name,
+            'location': f'{filename}:{lineno}' if lineno else filename,
+            'calls': (total_calls if calls == total_calls
+                      else f'{total_calls}/{calls}'),
+            'own_time': own_time,
+            'cumulative': cumulative,
+        })
+    return functions
+
+
+def build_report(request, response, profiler, queries, elapsed):
+    explained = {}
+    for query in queries:
+        if (query['sql'] not in explained
+                and len(explained) < settings.PROFILING_EXPLAIN_LIMIT):
+            explained[query['sql']] = explain(query)
+    repeats = Counter(query['sql'] for query in queries)
+    for query in queries:
+        query['plan'] = explained.get(query['sql'])
+        query['repeats'] = repeats[query['sql']]
+    return render_to_string('misc/profile.html', {
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'elapsed': elapsed,
+        'queries': queries,
+        'db_time': sum(query['time'] for query in queries),
+        'functions': top_functions(
+            profiler, settings.PROFILING_TOP_FUNCTIONS),
+    })
+
+
+def save_report(request, profiler, html):
+    '''Сохраняет pstats и HTML рядом, возвращает общее имя отчёта.'''
+    match = getattr(request, 'resolver_match', None)
+    view = match.url_name if match and match.url_name else 'unresolved'
+    now = time.time()
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+    name = f'{stamp}.{int(now * 1000) % 1000:03d}-{os.getpid()}-{view}'
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    path = os.path.join(settings.PROFILING_DIR, name)
+    profiler.dump_stats(f'{path}.prof')
+    with open(f'{path}.html', 'w', encoding='utf-8') as fp:
+        fp.write(html)
+    return name
+
+
+class ProfilingMiddleware:
+    '''
+    Должна стоять после аутентификации: пользователь загружается
+    только для запросов с параметром, а не для всех.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = request.META.get('HTTP_X_PROFILE') or request.GET.get(
+            settings.PROFILING_PARAM)
+        if not mode or not request.user.is_staff:
+            return self.get_response(request)
+        if not _lock.acquire(blocking=False):
+            response = self.get_response(request)
+            response['X-Profile-Report'] = 'busy'
+            return response
+        try:
+            return self.profile(request, mode)
+        finally:
+            _lock.release()
+
+    def profile(self, request, mode):
+        logs = [QueryLog(alias) for alias in connections]
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for log in logs:
+                stack.enter_context(
+                    connections[log.alias].execute_wrapper(log))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - start
+        queries = [query for log in logs for query in log.queries]
+        html = build_report(request, response, profiler, queries, elapsed)
+        name = save_report(request, profiler, html)
+        if mode == 'html':
+            response = HttpResponse(html)
+        response['X-Profile-Report'] = name
+        return response
@@ -0,0 +1,85 @@
+import random
+import threading
+
+from django.conf import settings
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE = 'pin_primary'
+
+_local = threading.local()
+
+
+def is_pinned():
+    # вне веб-запросов (команды, фоновые задачи) читаем из основной базы
+    return getattr(_local, 'pinned', True)
+
+
+def set_pinned(value):
+    _local.pinned = value
+
+
+class PrimaryReplicaRouter:
+    '''
+    Запись всегда идёт в default, чтение лент и профилей — на одну из
+    реплик из settings.DATABASE_REPLICAS. Пока запрос закреплён за
+    основной базой (см. ReadYourWritesMiddleware), чтение тоже идёт в
+    default, чтобы автор сразу видел свои изменения.
+    '''
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or is_pinned()
+                or model._meta.app_label not in settings.REPLICA_APP_LABELS):
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # реплики — копии основной базы, миграции в них не применяются
+        return db == 'default'
+
+
+def writes_data(view_func):
+    '''
+    Помечает view, которое пишет в базу даже на GET-запрос.
+    '''
+    view_func.writes_data = True
+    return view_func
+
+
+class ReadYourWritesMiddleware:
+    '''
+    Закрепляет за основной базой запросы, которые пишут, и все запросы
+    клиента в течение READ_YOUR_WRITES_SECONDS после записи.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.writes_data = request.method not in SAFE_METHODS
+        set_pinned(request.writes_data or PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            set_pinned(True)
+        if request.writes_data and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.READ_YOUR_WRITES_SECONDS,
+                httponly=True
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'writes_data', False):
+            request.writes_data = True
+            set_pinned(True)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -37,8 +38,8 @@ ALLOWED_HOSTS = [
 
 INSTALLED_APPS = [
     'about',
-    'users',
-    'posts',
+    'users.apps.UsersConfig',
+    'posts.apps.PostsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -46,27 +47,41 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
+    'yatube.apps.YatubeConfig',
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.MetricsMiddleware',
+    'yatube.routers.ReadYourWritesMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yatube.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yatube.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    # в продакшене шаблоны читаются и компилируются один раз на процесс
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'posts.context_processors.year',
                 'django.template.context_processors.debug',
@@ -88,7 +103,39 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # соединение живёт между запросами, а не открывается заново
+        'CONN_MAX_AGE': 60,
+    }
+}
+
+# Реплики для чтения: локально это копии db.sqlite3,
+# которые обновляет manage.py sync_replicas
+DATABASE_REPLICAS = []
+for number in range(1, int(os.environ.get('YATUBE_SQLITE_REPLICAS', 0)) + 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db.{alias}.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['yatube.routers.PrimaryReplicaRouter']
+# на реплики уходят только чтения моделей этих приложений
+REPLICA_APP_LABELS = {'posts'}
+# сколько секунд после записи клиент читает из основной базы
+READ_YOUR_WRITES_SECONDS = 10
+
+# Применяются к каждому новому соединению, см. yatube/db.py
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # отрицательное значение — размер в килобайтах
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
 }
 
 
@@ -129,6 +176,15 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+if not DEBUG:
+    # имена с хэшем содержимого плюс .gz/.br рядом, см. yatube/storage.py
+    STATICFILES_STORAGE = (
+        'yatube.storage.CompressedManifestStaticFilesStorage')
+# без DEBUG статику отдаёт yatube/static_views.py с долгим кэшированием
+SERVE_STATIC = not DEBUG
+STATIC_COMPRESS_MIN_SIZE = 256
+# для файлов без хэша в имени
+STATIC_MAX_AGE = 60
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -139,6 +195,10 @@ LOGIN_URL = "/auth/login/"
 LOGIN_REDIRECT_URL = "index"
 # LOGOUT_REDIRECT_URL = "index"
 
+# Адрес сайта для ссылок в письмах: у рассылок нет запроса,
+# из которого его можно взять
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
+
 #  подключаем движок filebased.EmailBackend
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 # указываем директорию, в которую будут складываться файлы писем
@@ -151,3 +211,104 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# Общий для всех воркеров кэш в файле SQLite, см. yatube/cache.py.
+# Включается путём к файлу, иначе (и в тестах) у каждого процесса свой
+YATUBE_CACHE_PATH = os.environ.get('YATUBE_CACHE_PATH')
+if YATUBE_CACHE_PATH:
+    CACHES['default'] = {
+        'BACKEND': 'yatube.cache.SQLiteCache',
+        'LOCATION': YATUBE_CACHE_PATH,
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+            # сколько секунд значение живёт в памяти процесса
+            'L1_TIMEOUT': 1,
+        },
+    }
+
+# Кэш со «старым значением на время пересчёта», см. posts/stale_cache.py:
+# сколько секунд после истечения срока отдаётся старое значение,
+# на сколько берётся блокировка пересчёта и сколько ждать первого расчёта
+STALE_CACHE_GRACE = 60
+STALE_CACHE_LOCK_TIMEOUT = 10
+STALE_CACHE_WAIT = 2
+
+# Ограничение частоты записи: "токенов/период" на пользователя и на IP
+RATELIMIT_ENABLE = True
+RATELIMIT_RATES = {
+    'new_post': {'user': '20/m', 'ip': '100/m'},
+    'add_comment': {'user': '30/m', 'ip': '150/m'},
+    'profile_follow': {'user': '60/m', 'ip': '300/m'},
+    'follow_batch': {'user': '10/h', 'ip': '30/h'},
+    'like': {'user': '120/m', 'ip': '600/m'},
+}
+# Прокси (nginx), которым доверяется заголовок X-Forwarded-For: для их
+# запросов лимит по IP считается по адресу клиента из заголовка
+RATELIMIT_TRUSTED_PROXIES = [
+    address for address in os.environ.get(
+        'RATELIMIT_TRUSTED_PROXIES', '').split(',') if address
+]
+# сколько имён принимает один запрос follow/batch/
+FOLLOW_BATCH_LIMIT = 1000
+
+# История правок: каждая N-я версия хранится целиком, остальные —
+# разницей; manage.py compact_revisions оставляет последние KEEP версий
+POST_REVISION_SNAPSHOT_EVERY = 10
+POST_REVISION_KEEP = 50
+
+# Лайк пишет приращение в один из шардов счётчика поста,
+# manage.py merge_likes сводит шарды в Post.likes
+LIKE_COUNTER_SHARDS = 8
+
+# Счётчики просмотров копятся в памяти процесса и пишутся пачкой
+VIEW_COUNTER_FLUSH_INTERVAL = 10
+VIEW_COUNTER_MAX_PENDING = 1000
+
+# Метрики Prometheus: каждый воркер пишет свой файл в METRICS_DIR
+METRICS_DIR = os.path.join(tempfile.gettempdir(), 'yatube-metrics')
+METRICS_FLUSH_INTERVAL = 5
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+# manage.py test подменяет METRICS_DIR временным каталогом
+TEST_RUNNER = 'yatube.test_runner.TestRunner'
+
+# Посты старше этого возраста manage.py archive_posts переносит в архив
+POST_ARCHIVE_AFTER_DAYS = 365
+
+# Уведомления о новых постах рассылает manage.py process_notifications;
+# посты за одно окно (в секундах) сворачиваются в одно уведомление
+NOTIFICATION_WINDOW = 60 * 15
+# дублировать ли новые уведомления письмом через EMAIL_BACKEND
+NOTIFICATION_EMAIL = False
+
+# Ежедневный дайджест: manage.py send_digests --resume продолжает
+# прерванную рассылку с пользователя из этого файла
+DIGEST_CHECKPOINT_FILE = os.path.join(
+    tempfile.gettempdir(), 'yatube-digest.json')
+DIGEST_POSTS_LIMIT = 10
+
+# Живая лента (SSE), см. posts/live.py: сколько последних постов
+# помнит процесс, как часто слать keepalive и сколько секунд держать
+# соединение, прежде чем браузер переподключится
+SSE_BACKLOG = 100
+SSE_KEEPALIVE = 15
+SSE_MAX_LIFETIME = 30
+SSE_RETRY_MS = 3000
+# каждый поток SSE держит поток WSGI-сервера: не больше стольких на
+# процесс, остальным клиентам — повторить попытку позже
+SSE_MAX_STREAMS = 2
+SSE_BUSY_RETRY_MS = 30000
+
+# Сессии читаются из кэша и только при промахе — из базы
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# Пользователь текущей сессии тоже кэшируется, см. users/middleware.py
+USER_CACHE_TIMEOUT = 60 * 15
+
+# Сжатие ответов, см. yatube/compression.py
+COMPRESS_CONTENT_TYPES = {'text/html', 'application/json'}
+COMPRESS_MIN_SIZE = 1024
+
+# Профилирование запроса сотрудником: ?_profile=1 или X-Profile: 1,
+# отчёты (pstats и HTML) пишутся сюда, см. yatube/profiling.py
+PROFILING_PARAM = '_profile'
+PROFILING_DIR = os.path.join(tempfile.gettempdir(), 'yatube-profiles')
+PROFILING_TOP_FUNCTIONS = 40
+PROFILING_EXPLAIN_LIMIT = 50
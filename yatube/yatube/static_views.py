@@ -0,0 +1,61 @@
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# порядок важен: brotli сжимает лучше, поэтому пробуем его первым
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(request):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return {part.split(';')[0].strip() for part in header.split(',')}
+
+
+def is_hashed(path):
+    '''Имя с хэшем содержимого из манифеста collectstatic.'''
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+    return path in set(hashed_files.values())
+
+
+def serve(request, path):
+    '''
+    Отдаёт файл из STATIC_ROOT, выбирая заранее сжатый вариант по
+    Accept-Encoding. Файлы с хэшем в имени кэшируются браузером
+    навсегда: при изменении содержимого меняется и имя.
+    '''
+    path = posixpath.normpath(path).lstrip('/')
+    fullpath = safe_join(settings.STATIC_ROOT, path)
+    if not os.path.isfile(fullpath):
+        raise Http404(f'«{path}» не найден')
+    content_type, _ = mimetypes.guess_type(fullpath)
+    accepted = accepted_encodings(request)
+    chosen, encoding = fullpath, None
+    for name, extension in ENCODINGS:
+        if name in accepted and os.path.isfile(fullpath + extension):
+            chosen, encoding = fullpath + extension, name
+            break
+    stat = os.stat(chosen)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              stat.st_mtime, stat.st_size):
+        return HttpResponseNotModified()
+    response = FileResponse(
+        open(chosen, 'rb'),
+        content_type=content_type or 'application/octet-stream'
+    )
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = (
+        IMMUTABLE if is_hashed(path)
+        else f'public, max-age={settings.STATIC_MAX_AGE}'
+    )
+    return response
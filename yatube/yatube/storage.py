@@ -0,0 +1,53 @@
+import gzip
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # brotli не обязателен, хватит и gzip
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.json', '.map', '.txt', '.xml', '.html',
+    '.ttf', '.eot', '.ico',
+)
+
+
+def compress_variants(content):
+    '''Сжатые варианты файла: расширение -> байты.'''
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content)
+    return variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    '''
+    Кроме имён с хэшем содержимого, при collectstatic рядом с каждым
+    текстовым файлом кладёт .gz и, если установлен brotli, .br.
+    Сжатый вариант сохраняется, только если он действительно меньше.
+    '''
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in set(self.hashed_files.values()):
+            self.compress(hashed_name)
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < settings.STATIC_COMPRESS_MIN_SIZE:
+            return
+        for extension, compressed in compress_variants(content).items():
+            if len(compressed) >= len(content):
+                continue
+            path = name + extension
+            if self.exists(path):
+                self.delete(path)
+            self._save(path, ContentFile(compressed))
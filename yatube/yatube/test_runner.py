@@ -0,0 +1,22 @@
+import atexit
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+def isolate_metrics():
+    '''
+    Тесты пишут метрики во временный каталог, а не в общий METRICS_DIR.
+    Каталог удаляется при выходе уже после финального flush метрик:
+    atexit вызывает функции в обратном порядке регистрации.
+    '''
+    settings.METRICS_DIR = tempfile.mkdtemp(prefix='yatube-metrics-')
+    atexit.register(shutil.rmtree, settings.METRICS_DIR, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        isolate_metrics()
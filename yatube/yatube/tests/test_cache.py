@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import time
+from multiprocessing import get_context
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from yatube.cache import SQLiteCache
+
+
+def make_cache(path, **options):
+    return SQLiteCache(path, {'OPTIONS': options})
+
+
+def increment(path, times):
+    cache = make_cache(path)
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'cache.sqlite3')
+        self.cache = make_cache(self.path, L1_TIMEOUT=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_set_get_delete(self):
+        self.cache.set('key', {'a': 1})
+        self.assertEqual(self.cache.get('key'), {'a': 1})
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_shared_between_instances(self):
+        other = make_cache(self.path, L1_TIMEOUT=0)
+        self.cache.set('key', 'value')
+        self.assertEqual(other.get('key'), 'value')
+        other.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        other.set('key', 'new')
+        self.cache.clear()
+        self.assertIsNone(other.get('key'))
+
+    def test_many(self):
+        self.cache.set_many({'a': 1, 'b': 2, 'c': 3})
+        self.assertEqual(
+            self.cache.get_many(['a', 'c', 'missing']), {'a': 1, 'c': 3})
+        self.cache.delete_many(['a', 'b'])
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'c': 3})
+
+    def test_timeout(self):
+        self.cache.set('key', 'value', 10)
+        self.assertTrue(self.cache.has_key('key'))
+        with mock.patch('time.time', return_value=time.time() + 11):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache.add('key', 'again'))
+        self.cache.set('forever', 1, None)
+        with mock.patch('time.time', return_value=time.time() + 10 ** 6):
+            self.assertEqual(self.cache.get('forever'), 1)
+
+    def test_add_and_incr(self):
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertFalse(self.cache.add('counter', 100))
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        self.assertEqual(self.cache.decr('counter'), 2)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_incr_atomic_across_processes(self):
+        self.cache.set('counter', 0)
+        context = get_context('fork')
+        workers = [
+            context.Process(target=increment, args=(self.path, 50))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_l1_serves_reads(self):
+        cache = make_cache(self.path, L1_TIMEOUT=60)
+        cache.set('key', 'value')
+        cache.get('key')
+        self.cache.set('key', 'changed')
+        self.assertEqual(cache.get('key'), 'value')
+        cache.set('key', 'mine')
+        self.assertEqual(cache.get('key'), 'mine')
+
+    def test_l1_returns_copies(self):
+        cache = make_cache(self.path, L1_TIMEOUT=60)
+        cache.set('key', {'backend': None})
+        first = cache.get('key')
+        first['backend'] = 'changed'
+        self.assertEqual(cache.get('key'), {'backend': None})
+        self.assertEqual(cache.get_many(['key']), {'key': {'backend': None}})
+
+    def test_cull(self):
+        cache = make_cache(self.path, MAX_ENTRIES=10, CULL_FREQUENCY=2)
+        for i in range(30):
+            cache.set(f'key{i}', i)
+        count = cache.connection.execute(
+            'SELECT COUNT(*) FROM cache').fetchone()[0]
+        self.assertLessEqual(count, 10)
+        self.assertEqual(cache.get('key29'), 29)
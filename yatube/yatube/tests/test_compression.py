@@ -0,0 +1,40 @@
+import gzip
+
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from yatube.compression import CompressionMiddleware
+
+HTML = '<div class="card">пост</div>\n' * 200
+
+
+def compress(response, accept='gzip, deflate'):
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def test_large_html_compressed(self):
+        response = compress(HttpResponse(HTML))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content).decode(), HTML)
+
+    def test_client_without_gzip(self):
+        response = compress(HttpResponse(HTML), accept='identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_small_response_untouched(self):
+        response = compress(JsonResponse({'ok': True}))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_other_content_types_untouched(self):
+        response = compress(HttpResponse(HTML, content_type='image/svg+xml'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_html_compressed(self):
+        response = compress(StreamingHttpResponse(
+            (HTML for _ in range(3)), content_type='text/html'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body).decode(), HTML * 3)
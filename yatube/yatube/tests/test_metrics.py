@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from http import HTTPStatus
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube import metrics
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.metrics_dir = tempfile.mkdtemp()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(text='Текст', author=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.metrics_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_histogram_buckets(self):
+        metrics.observe('yatube_db_queries', 'test_view', 4)
+        data = metrics.snapshot()['histograms']['yatube_db_queries']
+        buckets = data['test_view']['buckets']
+        self.assertEqual(buckets[metrics.QUERY_BUCKETS.index(5)], 1)
+        text = metrics.render_text(metrics.snapshot())
+        self.assertIn(
+            'yatube_db_queries_bucket{view="test_view",le="3"} 0', text)
+        self.assertIn(
+            'yatube_db_queries_bucket{view="test_view",le="5"} 1', text)
+
+    def test_request_is_recorded(self):
+        with override_settings(METRICS_DIR=self.metrics_dir):
+            Client().get(reverse('index'))
+            response = Client().get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        text = response.content.decode()
+        self.assertIn('yatube_request_duration_seconds_count{view="index"}',
+                      text)
+        self.assertIn('yatube_db_queries_sum{view="index"}', text)
+        self.assertIn('yatube_template_render_seconds_sum{view="index"}',
+                      text)
+
+    def test_other_processes_are_merged(self):
+        other = {
+            'histograms': {},
+            'counters': {'yatube_cache_hits_total': {'other_view': 7}},
+        }
+        with open(os.path.join(self.metrics_dir, '1.json'), 'w') as fp:
+            json.dump(other, fp)
+        with override_settings(METRICS_DIR=self.metrics_dir):
+            text = Client().get(reverse('metrics')).content.decode()
+        self.assertIn('yatube_cache_hits_total{view="other_view"} 7', text)
+
+    def test_dead_process_is_archived(self):
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        path = os.path.join(self.metrics_dir, f'{process.pid}.json')
+        with open(path, 'w') as fp:
+            json.dump({
+                'histograms': {},
+                'counters': {'yatube_cache_misses_total': {'gone_view': 3}},
+            }, fp)
+        with override_settings(METRICS_DIR=self.metrics_dir):
+            for _ in range(2):
+                text = Client().get(reverse('metrics')).content.decode()
+                self.assertIn(
+                    'yatube_cache_misses_total{view="gone_view"} 3', text)
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(
+            os.path.join(self.metrics_dir, metrics.ARCHIVE_FILE)))
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_forbidden_for_unknown_ip(self):
+        response = Client().get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
@@ -0,0 +1,54 @@
+import os
+import pstats
+import shutil
+import tempfile
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='user')
+        Post.objects.create(text='Текст', author=cls.user)
+
+    def setUp(self):
+        self.profiles_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profiles_dir, True)
+        override = override_settings(PROFILING_DIR=self.profiles_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client = Client()
+        self.client.force_login(self.staff)
+
+    def test_html_report(self):
+        response = self.client.get(reverse('index'), {'_profile': 'html'})
+        self.assertContains(response, 'SQL')
+        self.assertContains(response, 'posts_post')
+        # план SQLite для запроса ленты
+        self.assertContains(response, 'SCAN')
+        self.assertNotContains(response, 'class="card')
+
+    def test_report_is_stored(self):
+        response = self.client.get(reverse('index'), HTTP_X_PROFILE='1')
+        self.assertContains(response, 'Текст')
+        path = os.path.join(
+            self.profiles_dir, response['X-Profile-Report'])
+        self.assertTrue(os.path.exists(f'{path}.html'))
+        stats = pstats.Stats(f'{path}.prof')
+        self.assertTrue(any(
+            name == 'index' for _, _, name in stats.stats))
+
+    def test_not_triggered_for_others(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('index'), {'_profile': 'html'})
+        self.assertNotIn('X-Profile-Report', response)
+        self.assertContains(response, 'Текст')
+        response = Client().get(reverse('index'))
+        self.assertNotIn('X-Profile-Report', response)
+        self.assertEqual(os.listdir(self.profiles_dir), [])
@@ -0,0 +1,57 @@
+from django.contrib.sessions.models import Session
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube import routers
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class PrimaryReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = routers.PrimaryReplicaRouter()
+        routers.set_pinned(False)
+
+    def tearDown(self):
+        routers.set_pinned(True)
+
+    def test_reads_go_to_replicas(self):
+        self.assertIn(self.router.db_for_read(Post), ['replica1', 'replica2'])
+
+    def test_other_apps_read_primary(self):
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_pinned_reads_go_to_primary(self):
+        routers.set_pinned(True)
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReadYourWritesMiddlewareTests(TestCase):
+    def test_write_sets_pin_cookie(self):
+        client = Client()
+        client.force_login(User.objects.create_user(username='author'))
+        response = client.post(reverse('new_post'), {'text': 'Текст'})
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_get_write_view_sets_pin_cookie(self):
+        client = Client()
+        client.force_login(User.objects.create_user(username='follower'))
+        author = User.objects.create_user(username='author')
+        response = client.get(
+            reverse('profile_follow', kwargs={'username': author.username}))
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_pinned_outside_requests(self):
+        self.assertTrue(routers.is_pinned())
@@ -0,0 +1,61 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from yatube.static_views import IMMUTABLE, serve
+
+CSS = 'body { color: red; }\n' * 100
+
+
+class CompressedStaticTests(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.source, 'css'))
+        with open(os.path.join(self.source, 'css', 'site.css'), 'w') as fp:
+            fp.write(CSS)
+        self.settings = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            STATICFILES_STORAGE=(
+                'yatube.storage.CompressedManifestStaticFilesStorage'),
+        )
+        self.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     stdout=StringIO())
+        self.hashed = staticfiles_storage.stored_name('css/site.css')
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.source, ignore_errors=True)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_gzip_variant_created(self):
+        self.assertNotEqual(self.hashed, 'css/site.css')
+        path = os.path.join(self.root, self.hashed + '.gz')
+        with gzip.open(path, 'rt') as fp:
+            self.assertEqual(fp.read(), CSS)
+
+    def test_serve_hashed_compressed(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+        response = serve(request, self.hashed)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        body = b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(gzip.decompress(body).decode(), CSS)
+
+    def test_serve_plain_without_hash(self):
+        request = RequestFactory().get('/')
+        response = serve(request, 'css/site.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotEqual(response['Cache-Control'], IMMUTABLE)
+        response.close()